@@ -1,3 +1,287 @@
-from deepface import DeepFace
+import time
+import queue
+import asyncio
+import argparse
+import threading
 
-DeepFace.stream("database")
\ No newline at end of file
+# ============================
+# Emoções ao vivo (webcam)
+# ============================
+# Três threads ligadas por filas pequenas:
+#   captura    -> lê a câmera (ou um vídeo, como câmera falsa) sem parar
+#   inferência -> pega só os frames mais recentes, descarta os velhos e classifica
+#   consumidor -> quem itera em eventos() / async for
+# As filas descartam o item mais antigo quando cheias, então o atraso fica
+# limitado ao tamanho delas em vez de crescer enquanto o modelo não acompanha.
+
+FIM = object()  # sentinela de fim de fluxo
+
+
+class FilaDescartavel:
+    # Fila limitada em que put() nunca bloqueia: se está cheia, joga fora o
+    # item mais antigo para dar lugar ao novo
+    def __init__(self, tamanho=2):
+        self._fila = queue.Queue(maxsize=tamanho)
+        self._lock = threading.Lock()
+        self.descartados = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._fila.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._fila.get_nowait()
+                        self.descartados += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        return self._fila.get(timeout=timeout)
+
+    def get_nowait(self):
+        return self._fila.get_nowait()
+
+
+class Camera:
+    # `fonte` inteiro = índice da webcam; caminho = vídeo lido como se fosse
+    # uma câmera (no ritmo do fps do arquivo), para testar sem webcam
+    def __init__(self, fonte=0, ritmo_real=True, largura=None):
+        import cv2
+
+        self.arquivo = not isinstance(fonte, int)
+        self.captura = cv2.VideoCapture(fonte if not self.arquivo else str(fonte))
+        if not self.captura.isOpened():
+            raise RuntimeError(f"Não foi possível abrir a fonte de vídeo: {fonte!r}")
+        if largura and not self.arquivo:
+            self.captura.set(cv2.CAP_PROP_FRAME_WIDTH, largura)
+        self.fps = self.captura.get(cv2.CAP_PROP_FPS) or 30.0
+        self.ritmo_real = ritmo_real
+
+    def frames(self, parar):
+        # Gera (tempo, frame); tempo é o instante do frame em segundos desde o início
+        inicio = time.monotonic()
+        i = 0
+        while not parar.is_set():
+            ok, frame = self.captura.read()
+            if not ok:
+                return
+            if self.arquivo:
+                tempo = i / self.fps
+                if self.ritmo_real:
+                    espera = inicio + tempo - time.monotonic()
+                    if espera > 0:
+                        time.sleep(espera)
+            else:
+                tempo = time.monotonic() - inicio
+            i += 1
+            yield tempo, frame
+
+    def fechar(self):
+        self.captura.release()
+
+
+class PipelineTempoReal:
+    def __init__(self, fonte=0, motor=None, latencia_alvo=0.5, lote_max=4, intervalo_deteccao=5,
+                 detector_backend="opencv", ritmo_real=True, tamanho_fila=2, galeria=None):
+        self.fonte = fonte
+        self.latencia_alvo = latencia_alvo
+        self.lote_max = lote_max
+        self.ritmo_real = ritmo_real
+        self._motor = motor
+        # GaleriaFaces opcional: identifica quem está no quadro a cada detecção
+        self.galeria = galeria
+        self._pessoa = None
+        self._config_motor = (detector_backend, intervalo_deteccao)
+
+        self._frames = FilaDescartavel(tamanho_fila)
+        self._eventos = FilaDescartavel(max(tamanho_fila, 8))
+        self._parar = threading.Event()
+        self._threads = []
+        self.atrasados = 0     # frames descartados por passarem da latência alvo
+        self.processados = 0
+
+    @property
+    def motor(self):
+        if self._motor is None:
+            from inferencia import MotorEmocoes
+            detector_backend, intervalo_deteccao = self._config_motor
+            # Rastreamento entre detecções: a detecção completa é o passo mais caro
+            self._motor = MotorEmocoes(detector_backend=detector_backend, tamanho_lote=self.lote_max,
+                                       intervalo_deteccao=intervalo_deteccao)
+            self._motor.modelo
+        return self._motor
+
+    # ----------------------------
+    # Threads
+    # ----------------------------
+    def _capturar(self):
+        camera = Camera(self.fonte, ritmo_real=self.ritmo_real)
+        try:
+            for tempo, frame in camera.frames(self._parar):
+                self._frames.put((time.monotonic(), tempo, frame))
+        finally:
+            camera.fechar()
+            self._frames.put(FIM)
+
+    def _inferir(self):
+        motor = self.motor
+        try:
+            while not self._parar.is_set():
+                try:
+                    item = self._frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                lote, fim = [], item is FIM
+                while not fim:
+                    lote.append(item)
+                    if len(lote) >= self.lote_max:
+                        break
+                    try:
+                        item = self._frames.get_nowait()
+                    except queue.Empty:
+                        break
+                    fim = item is FIM
+
+                # Frames que já passaram da latência alvo não valem o processamento
+                agora = time.monotonic()
+                recentes = [f for f in lote if agora - f[0] <= self.latencia_alvo]
+                self.atrasados += len(lote) - len(recentes)
+                if not recentes and lote:
+                    recentes = lote[-1:]
+                    self.atrasados -= 1
+
+                if recentes:
+                    resultados = motor.analisar_lote([f[2] for f in recentes])
+                    fim_inferencia = time.monotonic()
+                    for (capturado, tempo, frame), r in zip(recentes, resultados):
+                        evento = _evento(tempo, r, fim_inferencia - capturado)
+                        evento["pessoa"] = self._identificar(frame, r)
+                        self._eventos.put(evento)
+                    self.processados += len(recentes)
+                if fim:
+                    break
+        finally:
+            self._eventos.put(FIM)
+
+    def _identificar(self, frame, resultado):
+        # O embedding só é recalculado nas detecções completas; entre elas o
+        # rastreador segue o mesmo rosto e a identidade é mantida. Perdeu o
+        # rosto: esquece a identidade, quem aparecer depois é identificado de novo
+        if self.galeria is None:
+            return None
+        if resultado["region"] is None:
+            self._pessoa = None
+            return None
+        if resultado["origem"] == "deteccao" or self._pessoa is None:
+            r = resultado["region"]
+            recorte = frame[max(r["y"], 0):r["y"] + r["h"], max(r["x"], 0):r["x"] + r["w"]]
+            self._pessoa = self.galeria.identificar_rosto(recorte) if recorte.size else None
+        return self._pessoa
+
+    # ----------------------------
+    # API
+    # ----------------------------
+    def iniciar(self):
+        self._parar.clear()
+        # Carrega o modelo antes de abrir a câmera para não acumular atraso
+        self.motor
+        self._threads = [
+            threading.Thread(target=self._capturar, name="captura", daemon=True),
+            threading.Thread(target=self._inferir, name="inferencia", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def eventos(self):
+        # Gerador bloqueante de eventos, na ordem em que ficam prontos
+        if not self._threads:
+            self.iniciar()
+        try:
+            while True:
+                evento = self._eventos.get()
+                if evento is FIM:
+                    return
+                yield evento
+        finally:
+            self.parar()
+
+    def __iter__(self):
+        return self.eventos()
+
+    async def __aiter__(self):
+        # Mesmo fluxo para código asyncio; a espera pela fila roda numa thread
+        if not self._threads:
+            self.iniciar()
+        try:
+            while True:
+                evento = await asyncio.to_thread(self._eventos.get)
+                if evento is FIM:
+                    return
+                yield evento
+        finally:
+            self.parar()
+
+    def estatisticas(self):
+        return {
+            "processados": self.processados,
+            "descartados_captura": self._frames.descartados,
+            "descartados_atraso": self.atrasados,
+            "descartados_consumidor": self._eventos.descartados,
+        }
+
+
+def _evento(tempo, resultado, latencia):
+    probs = resultado["probabilidades"]
+    return {
+        "tempo": round(float(tempo), 3),
+        "emocao": resultado["dominant_emotion"],
+        "probabilidades": resultado["emotion"],
+        "confianca": resultado["face_confidence"],
+        "origem": resultado["origem"],
+        "latencia": round(latencia, 3),
+        "tem_rosto": probs is not None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emoções faciais ao vivo a partir da webcam ou de um vídeo.")
+    parser.add_argument("fonte", nargs="?", default="0", help="índice da webcam ou caminho de um vídeo (câmera falsa)")
+    parser.add_argument("--latencia", type=float, default=0.5, help="latência alvo em segundos")
+    parser.add_argument("--lote", type=int, default=4)
+    parser.add_argument("--intervalo-deteccao", type=int, default=5)
+    parser.add_argument("--detector", default="opencv")
+    parser.add_argument("--galeria", nargs="?", const="database", default=None,
+                        help="identifica os participantes cadastrados nesta pasta (padrão: database)")
+    args = parser.parse_args()
+
+    galeria = None
+    if args.galeria:
+        from galeria import abrir_galeria
+        galeria = abrir_galeria(args.galeria, detector_backend=args.detector)
+
+    fonte = int(args.fonte) if args.fonte.isdigit() else args.fonte
+    pipeline = PipelineTempoReal(fonte, latencia_alvo=args.latencia, lote_max=args.lote,
+                                 intervalo_deteccao=args.intervalo_deteccao, detector_backend=args.detector,
+                                 galeria=galeria)
+    try:
+        for evento in pipeline:
+            pessoa = evento["pessoa"] or "-"
+            print(f"{evento['tempo']:8.2f}s  {pessoa:<12} {evento['emocao']:<10} latência {evento['latencia'] * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    print(f"📊 {pipeline.estatisticas()}")
@@ -1,69 +1,151 @@
 import json
+import argparse
 import pandas as pd
+from plotagem import renderizar, configurar, opcoes, FORMATOS
 import matplotlib.pyplot as plt
 from pathlib import Path
 import seaborn as sns
 
-def processar_emocoes(caminho_base):
+from linha_do_tempo import EMOCOES, ler_linha, para_linha, caminho_linha, resumo_linha
+from cache_estagios import hash_arquivo
+
+# Manifesto das pessoas já resumidas: arquivo de origem, tamanho, mtime, hash
+# e a linha calculada, mais o formato/dpi das figuras geradas. Só pastas novas
+# ou alteradas são relidas. É gravado só depois da tabela e de todas as
+# figuras: uma geração interrompida é refeita na próxima execução.
+MANIFESTO = ".manifesto_resumo.json"
+# Muda quando as colunas do resumo mudam: entradas antigas do manifesto são refeitas
+VERSAO_RESUMO = 2
+FIGURAS = ("comparativo_emocoes", "heatmap_emocoes", "boxplot_emocoes")
+
+def _arquivo_fonte(pasta_pessoa):
+    # Prefere a linha do tempo colunar (.npy, lida via mmap), depois o JSON
+    # por frame; sem nenhum dos dois, usa o JSON de contagens
+    nome_bruto = pasta_pessoa.name
+    for arquivo in (caminho_linha(pasta_pessoa, nome_bruto), pasta_pessoa / f"{nome_bruto}_detalhado.json",
+                    pasta_pessoa / f"{nome_bruto}.json"):
+        if arquivo.exists():
+            return arquivo
+    return None
+
+def _assinatura(arquivo, anterior):
+    stat = arquivo.stat()
+    assinatura = {"arquivo": arquivo.name, "tamanho": stat.st_size, "mtime": stat.st_mtime}
+    # O hash só é recalculado quando tamanho/mtime mudam
+    if anterior and all(anterior.get(k) == v for k, v in assinatura.items()):
+        assinatura["sha256"] = anterior["sha256"]
+    else:
+        assinatura["sha256"] = hash_arquivo(arquivo)
+    return assinatura
+
+def _resumo_pessoa(arquivo):
+    # Colunas das emoções: % do tempo com cada emoção dominante (mesmos nomes
+    # de antes, então os scripts estatísticos seguem funcionando); as demais
+    # colunas vêm das probabilidades do modelo quando a linha do tempo as tem
+    if arquivo.suffix == ".npy":
+        linha = ler_linha(arquivo)
+    else:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if not isinstance(dados, list):
+            # Só contagens: participação por número de frames
+            total_emocoes = sum(dados.values())
+            if total_emocoes <= 0:
+                return None
+            return {emocao: (valor / total_emocoes) * 100 for emocao, valor in dados.items()}
+        linha = para_linha(dados)
+
+    resumo = resumo_linha(linha)
+    if "participacao" not in resumo:
+        return None
+    dados = dict(resumo["participacao"])
+    for emocao, valor in resumo.get("probabilidade_media", {}).items():
+        dados[f"prob_{emocao}"] = valor
+    for coluna in ("entropia", "entropia_distribuicao"):
+        if coluna in resumo:
+            dados[coluna] = resumo[coluna]
+    dados.update(sem_rosto=resumo["sem_rosto"], n_frames=resumo["n_frames"], duracao_s=resumo["duracao"])
+    return dados
+
+def processar_emocoes(caminho_base, forcar=False):
     base_path = Path(caminho_base)
-    dados_gerais = []
+    caminho_manifesto = base_path / MANIFESTO
+    manifesto = {}
+    if caminho_manifesto.exists() and not forcar:
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    saida = {"formato": opcoes["formato"], "dpi": opcoes["dpi"]}
+    saida_anterior = manifesto.get("saida")
+    # Manifestos antigos (sem "pessoas") são refeitos do zero
+    manifesto = manifesto.get("pessoas", {})
     
     print(f"🔍 Procurando arquivos em: {base_path.resolve()}")
 
-    for pasta_pessoa in base_path.iterdir():
-        if pasta_pessoa.is_dir():
+    atual = {}
+    alterados = 0
+    for pasta_pessoa in sorted(p for p in base_path.iterdir() if p.is_dir()):
+        nome_bruto = pasta_pessoa.name
+        arquivo = _arquivo_fonte(pasta_pessoa)
+        if arquivo is None:
+            continue
+
+        anterior = manifesto.get(nome_bruto)
+        try:
+            assinatura = _assinatura(arquivo, anterior)
+            if (anterior and anterior.get("versao") == VERSAO_RESUMO and anterior["arquivo"] == assinatura["arquivo"]
+                    and anterior["sha256"] == assinatura["sha256"]):
+                atual[nome_bruto] = {**anterior, **assinatura}
+                continue
+            atual[nome_bruto] = {**assinatura, "versao": VERSAO_RESUMO, "dados": _resumo_pessoa(arquivo)}
+            alterados += 1
+        except Exception as e:
+            print(f"❌ Erro ao ler {pasta_pessoa}: {e}")
+
+    removidos = set(manifesto) - set(atual)
+
+    tabela = base_path / "resumo_frequencias.csv"
+    saidas = [tabela, base_path / "resumo_frequencias.json"]
+    saidas += [base_path / f"{nome}.{saida['formato']}" for nome in FIGURAS]
+    if not alterados and not removidos and saida_anterior == saida and all(c.exists() for c in saidas):
+        _salvar_manifesto(caminho_manifesto, saida, atual)
+        print("✅ Nenhuma entrevista nova ou alterada; resumo e gráficos mantidos.")
+        return
+    print(f"🔄 {alterados} nova(s)/alterada(s), {len(removidos)} removida(s).")
+
+    dados_gerais = []
+    for nome_bruto, entrada in atual.items():
+        if entrada["dados"]:
             # --- CORREÇÃO 1: Limpeza do Nome ---
-            nome_bruto = pasta_pessoa.name
             # Troca underline/hífen por espaço e coloca Iniciais Maiúsculas
             # Ex: "joao_silva" vira "Joao Silva"
             nome_bonito = nome_bruto.replace("_", " ").replace("-", " ").title()
-            
-            # Procura o JSON (usando o nome original da pasta)
-            arquivo_json = pasta_pessoa / f"{nome_bruto}.json"
-            
-            if arquivo_json.exists():
-                try:
-                    with open(arquivo_json, 'r', encoding='utf-8') as f:
-                        contagem_absoluta = json.load(f)
-                    
-                    total_emocoes = sum(contagem_absoluta.values())
-                    
-                    if total_emocoes > 0:
-                        # Usa o 'nome_bonito' para o gráfico
-                        dados_pessoa = {'Pessoa': nome_bonito}
-                        
-                        for emocao, valor in contagem_absoluta.items():
-                            freq_relativa = (valor / total_emocoes) * 100
-                            dados_pessoa[emocao] = freq_relativa
-                        
-                        dados_gerais.append(dados_pessoa)
-                        
-                except Exception as e:
-                    print(f"❌ Erro ao ler {arquivo_json}: {e}")
+            dados_gerais.append({'Pessoa': nome_bonito, **entrada["dados"]})
 
     if not dados_gerais:
         print("Nenhum dado encontrado.")
         return
 
     df = pd.DataFrame(dados_gerais)
-    df = df.fillna(0)
     df.set_index('Pessoa', inplace=True)
+    emocoes = [e for e in EMOCOES if e in df.columns]
+    # Emoções primeiro (participação); colunas de probabilidade ficam vazias
+    # para quem só tem contagens
+    df = df[emocoes + [c for c in df.columns if c not in emocoes]]
+    df[emocoes] = df[emocoes].fillna(0)
 
     # Salvar CSV/JSON
     df_final = df.round(2)
-    df_final.to_csv(base_path / "resumo_frequencias.csv", encoding='utf-8-sig', sep=';')
+    df_final.to_csv(tabela, encoding='utf-8-sig', sep=';')
     df_final.to_json(base_path / "resumo_frequencias.json", orient='index', indent=4)
 
-    # --- GERAÇÃO DO GRÁFICO MELHORADA ---
-    print("📊 Gerando gráfico...")
+    gerar_graficos(df[emocoes], base_path, formato=saida["formato"], dpi=saida["dpi"])
+    _salvar_manifesto(caminho_manifesto, saida, atual)
 
-    nomes_genericos = [f"Pessoa {i+1}" for i in range(len(df))]
+def _salvar_manifesto(caminho, saida, pessoas):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({"saida": saida, "pessoas": pessoas}, f, ensure_ascii=False, indent=4)
 
-    df.index = nomes_genericos
-    
-    # Aumentei um pouco a figura para caber os nomes
-    plt.figure(figsize=(14, 8)) 
-    
+def _grafico_comparativo(df):
     ax = df.plot(kind='bar', stacked=True, colormap='Spectral', figsize=(12, 7))
 
     plt.title('Distribuição de Emoções (Frequência Relativa)', fontsize=16)
@@ -80,13 +162,7 @@ def processar_emocoes(caminho_base):
     # Garante que nada seja cortado na imagem final
     plt.tight_layout()
 
-    caminho_grafico = base_path / "comparativo_emocoes.png"
-    plt.savefig(caminho_grafico, dpi=300)
-    print(f"✅ Gráfico salvo: {caminho_grafico}")
-
-    # ... (código anterior onde o df é criado) ...
-
-    # --- NOVO GRÁFICO 1: Heatmap (Mapa de Calor) ---
+def _grafico_heatmap(df):
     plt.figure(figsize=(10, 8))
     
     # 'annot=True' escreve o número dentro do quadrado
@@ -96,10 +172,8 @@ def processar_emocoes(caminho_base):
     
     plt.title('Intensidade das Emoções por Pessoa (%)', fontsize=16)
     plt.tight_layout()
-    plt.savefig(base_path / "heatmap_emocoes.png", dpi=300)
-    print(f"✅ Heatmap salvo: {base_path / 'heatmap_emocoes.png'}")
 
-    # --- NOVO GRÁFICO 2: Boxplot (Distribuição Estatística) ---
+def _grafico_boxplot(df):
     plt.figure(figsize=(10, 6))
     
     # O boxplot ignora as pessoas e foca nas Emoções
@@ -113,8 +187,30 @@ def processar_emocoes(caminho_base):
     plt.grid(True, axis='y', alpha=0.3) # Linhas de grade ajudam a ler
     
     plt.tight_layout()
-    plt.savefig(base_path / "boxplot_emocoes.png", dpi=300)
-    print(f"✅ Boxplot salvo: {base_path / 'boxplot_emocoes.png'}")
+
+def gerar_graficos(df, base_path, workers=None, formato=None, dpi=None):
+    # --- GERAÇÃO DOS GRÁFICOS ---
+    # As três figuras são independentes: cada uma é renderizada num processo
+    print("📊 Gerando gráficos...")
+
+    df = df.copy()
+    df.index = [f"Pessoa {i+1}" for i in range(len(df))]
+
+    base_path = Path(base_path)
+    renderizar([
+        (_grafico_comparativo, {"df": df}, base_path / FIGURAS[0]),
+        # Heatmap (Mapa de Calor)
+        (_grafico_heatmap, {"df": df}, base_path / FIGURAS[1]),
+        # Boxplot (Distribuição Estatística)
+        (_grafico_boxplot, {"df": df}, base_path / FIGURAS[2]),
+    ], workers=workers, formato=formato, dpi=dpi)
 
 if __name__ == "__main__":
-    processar_emocoes("./resultados")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Resume as emoções de todas as entrevistas.")
+    parser.add_argument("--resultados", default="./resultados")
+    parser.add_argument("--forcar", action="store_true", help="reprocessa todas as pastas")
+    parser.add_argument("--format", dest="formato", choices=FORMATOS, default=None)
+    parser.add_argument("--dpi", type=int, default=None)
+    args = parser.parse_args()
+    configurar(args.formato, args.dpi)
+    processar_emocoes(args.resultados, forcar=args.forcar)
@@ -0,0 +1,198 @@
+import tempfile
+import subprocess
+
+import numpy as np
+
+# ============================
+# Áudio em memória
+# ============================
+# O áudio sai do ffmpeg já em 16 kHz mono s16le pelo stdout e vira float32
+# (o formato que o Whisper recebe) sem passar por arquivo.
+
+TAXA = 16000
+QUADRO_MS = 30
+# Acima desta duração (s) o áudio decodificado vai para um buffer mapeado em
+# disco (arquivo temporário anônimo) em vez da RAM: 2 h ≈ 460 MB em float32
+LIMITE_MEMORIA_S = 2 * 60 * 60
+
+
+def _comando_ffmpeg(caminho, taxa=TAXA):
+    return [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", str(caminho),
+        "-vn", "-sn",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(taxa), "-ac", "1",
+        "pipe:1",
+    ]
+
+
+def blocos_audio(fonte, taxa=TAXA, segundos=0.5):
+    # Gera blocos float32 de `segundos` de áudio. `fonte` é um array já em
+    # memória (float32, `taxa` Hz, mono) ou um caminho de áudio/vídeo lido
+    # pelo ffmpeg em streaming.
+    tamanho = max(int(taxa * segundos), 1)
+    if isinstance(fonte, np.ndarray):
+        fonte = fonte.reshape(-1)
+        for inicio in range(0, len(fonte), tamanho):
+            yield np.asarray(fonte[inicio:inicio + tamanho], dtype=np.float32)
+        return
+
+    processo = subprocess.Popen(_comando_ffmpeg(fonte, taxa), stdout=subprocess.PIPE)
+    try:
+        while True:
+            dados = processo.stdout.read(tamanho * 2)
+            if not dados:
+                break
+            yield np.frombuffer(dados[:len(dados) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+    finally:
+        processo.stdout.close()
+        processo.kill()
+        processo.wait()
+
+
+def _alocar(n, em_disco):
+    if not em_disco:
+        return np.empty(n, dtype=np.float32)
+    # O arquivo temporário já nasce sem nome; o mapeamento o mantém vivo
+    return np.memmap(tempfile.TemporaryFile(prefix="audio_"), dtype=np.float32, mode="w+", shape=(n,))
+
+
+def carregar_audio(caminho, taxa=TAXA, limite_memoria=LIMITE_MEMORIA_S, duracao=None):
+    # Decodifica o áudio inteiro de um vídeo/arquivo para float32 mono via
+    # pipe, sem WAV intermediário. O buffer é pré-alocado pela duração do
+    # container (ffprobe) e preenchido em blocos; se a duração estiver
+    # subestimada ele cresce.
+    if duracao is None:
+        from decodificacao import sondar_video
+        duracao = sondar_video(caminho)["duracao"]
+    em_disco = duracao > limite_memoria
+    audio = _alocar(int((duracao + 1) * taxa), em_disco)
+
+    bloco = np.empty(1 << 16, dtype="<i2")
+    visao = memoryview(bloco).cast("B")
+    n = 0
+    processo = subprocess.Popen(_comando_ffmpeg(caminho, taxa), stdout=subprocess.PIPE)
+    try:
+        while True:
+            lidos = processo.stdout.readinto(visao)
+            if not lidos:
+                break
+            if lidos % 2:
+                # Meia amostra no fim da leitura: completa o byte que falta
+                lidos += processo.stdout.readinto(visao[lidos:lidos + 1])
+            k = lidos // 2
+            if n + k > len(audio):
+                maior = _alocar(max(int(len(audio) * 1.5), n + k), em_disco)
+                maior[:n] = audio[:n]
+                audio = maior
+            np.multiply(bloco[:k], 1 / 32768.0, out=audio[n:n + k], casting="unsafe")
+            n += k
+    finally:
+        processo.stdout.close()
+        retorno = processo.wait()
+    if retorno != 0:
+        raise subprocess.CalledProcessError(retorno, _comando_ffmpeg(caminho, taxa))
+    return audio[:n]
+
+
+# ============================
+# Detecção de voz (VAD) por energia
+# ============================
+class DetectorVoz:
+    # Classifica quadros de QUADRO_MS como voz/silêncio comparando a energia
+    # (dBFS) com um piso de ruído estimado continuamente nos quadros sem voz.
+    # Funciona em streaming: guarda as amostras que sobram entre blocos.
+    def __init__(self, taxa=TAXA, quadro_ms=QUADRO_MS, margem_db=10.0, minimo_db=-50.0):
+        self.taxa = taxa
+        self.quadro = int(taxa * quadro_ms / 1000)
+        self.margem_db = margem_db
+        self.minimo_db = minimo_db
+        self.piso_db = None
+        self._resto = np.zeros(0, dtype=np.float32)
+
+    def energias(self, audio):
+        n = len(audio) // self.quadro
+        quadros = audio[:n * self.quadro].reshape(n, self.quadro)
+        rms = np.sqrt(np.mean(np.square(quadros, dtype=np.float64), axis=1))
+        return 20 * np.log10(np.maximum(rms, 1e-6))
+
+    def alimentar(self, bloco):
+        # Devolve (quadros, voz): os quadros completos deste bloco e um bool por quadro
+        audio = np.concatenate([self._resto, np.asarray(bloco, dtype=np.float32).reshape(-1)])
+        n = len(audio) // self.quadro
+        self._resto = audio[n * self.quadro:]
+        quadros = audio[:n * self.quadro].reshape(n, self.quadro)
+        energias = self.energias(audio[:n * self.quadro])
+
+        voz = np.zeros(n, dtype=bool)
+        for i, db in enumerate(energias):
+            if self.piso_db is None:
+                self.piso_db = db
+            voz[i] = db > max(self.piso_db + self.margem_db, self.minimo_db)
+            if db < self.piso_db:
+                self.piso_db = db
+            elif not voz[i]:
+                self.piso_db = 0.95 * self.piso_db + 0.05 * db
+        return quadros, voz
+
+
+def ler_wav(caminho):
+    # WAV PCM 16 bits mono (o que converter_para_wav gera) direto para float32
+    import wave
+
+    with wave.open(str(caminho), "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{caminho}: esperava PCM 16 bits mono")
+        dados = wav.readframes(wav.getnframes())
+    return np.frombuffer(dados, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def intervalos_fala(audio, taxa=TAXA, silencio_min=0.6, fala_min=0.3, margem=0.2, **opcoes_vad):
+    # Pré-passagem de VAD sobre o áudio inteiro: devolve um array (n, 2)
+    # float32 com [inicio, fim] em segundos de cada trecho de fala. Pausas
+    # menores que `silencio_min` não quebram o trecho; trechos menores que
+    # `fala_min` são descartados; cada trecho ganha `margem` s de cada lado.
+    detector = DetectorVoz(taxa, **opcoes_vad)
+    _, voz = detector.alimentar(audio)
+    duracao_quadro = detector.quadro / taxa
+    if not voz.any():
+        return np.zeros((0, 2), dtype=np.float32)
+
+    # Run-length das sequências de quadros com voz
+    bordas = np.diff(np.concatenate([[0], voz.astype(np.int8), [0]]))
+    inicios = np.flatnonzero(bordas == 1) * duracao_quadro
+    fins = np.flatnonzero(bordas == -1) * duracao_quadro
+
+    # Junta trechos separados por pausas curtas
+    quebras = np.flatnonzero(inicios[1:] - fins[:-1] >= silencio_min)
+    inicios = inicios[np.concatenate([[0], quebras + 1])]
+    fins = fins[np.concatenate([quebras, [len(fins) - 1]])]
+
+    manter = fins - inicios >= fala_min
+    duracao = len(audio) / taxa
+    inicios = np.maximum(inicios[manter] - margem, 0.0)
+    fins = np.minimum(fins[manter] + margem, duracao)
+    return np.stack([inicios, fins], axis=1).astype(np.float32)
+
+
+def agrupar_intervalos(intervalos, max_duracao=30.0, max_lacuna=2.0):
+    # Agrupa trechos vizinhos em blocos de até `max_duracao` s (a janela do
+    # Whisper); lacunas curtas entre eles entram no bloco para dar contexto
+    blocos = []
+    for inicio, fim in np.asarray(intervalos, dtype=np.float64):
+        if blocos and inicio - blocos[-1][1] <= max_lacuna and fim - blocos[-1][0] <= max_duracao:
+            blocos[-1][1] = float(fim)
+        else:
+            blocos.append([float(inicio), float(fim)])
+    return blocos
+
+
+def dentro_de_intervalos(tempos, intervalos):
+    # Máscara dos instantes que caem em algum [inicio, fim] (intervalos ordenados)
+    intervalos = np.asarray(intervalos, dtype=np.float64).reshape(-1, 2)
+    tempos = np.asarray(tempos, dtype=np.float64)
+    if not len(intervalos):
+        return np.zeros(tempos.shape, dtype=bool)
+    i = np.searchsorted(intervalos[:, 0], tempos, side="right") - 1
+    return (i >= 0) & (tempos <= intervalos[np.maximum(i, 0), 1])
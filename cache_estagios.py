@@ -0,0 +1,88 @@
+import json
+import hashlib
+import inspect
+import importlib.util
+import threading
+from pathlib import Path
+
+# ============================
+# Cache de estágios por conteúdo
+# ============================
+# Cada estágio do processamento (wav, transcrição, emoções, combinado, gráfico,
+# PDF) recebe uma chave = hash(entradas + parâmetros + chaves dos estágios
+# anteriores). Se a chave gravada no manifesto for igual e os arquivos de saída
+# existirem, o estágio é reaproveitado.
+
+TAMANHO_BLOCO = 1 << 20
+
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _fonte(objeto):
+    if isinstance(objeto, str):
+        # Nome de módulo: lê o arquivo inteiro sem importá-lo (não carrega
+        # TensorFlow/PyTorch só para calcular uma chave)
+        return Path(importlib.util.find_spec(objeto).origin).read_bytes()
+    return inspect.getsource(objeto).encode("utf-8")
+
+
+def hash_codigo(*funcoes):
+    # Mudou o código do estágio (ex.: layout do PDF) -> chave nova. Aceita
+    # funções/classes ou nomes de módulos cujo código todo decide o estágio.
+    h = hashlib.sha256()
+    for funcao in funcoes:
+        h.update(_fonte(funcao))
+    return h.hexdigest()[:16]
+
+
+def hash_parametros(**parametros):
+    texto = json.dumps(parametros, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class CacheEstagios:
+    def __init__(self, outdir, base, video_path):
+        self.caminho = Path(outdir) / f"{base}_cache.json"
+        self.video_path = Path(video_path)
+        self._lock = threading.Lock()  # áudio e vídeo registram estágios em threads diferentes
+        if self.caminho.exists():
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                self.manifesto = json.load(f)
+        else:
+            self.manifesto = {"video": {}, "estagios": {}}
+        self.hash_video = self._hash_video()
+
+    def _hash_video(self):
+        # O hash do vídeo só é recalculado se tamanho ou mtime mudarem
+        stat = self.video_path.stat()
+        info = self.manifesto.get("video", {})
+        if info.get("tamanho") == stat.st_size and info.get("mtime") == stat.st_mtime and info.get("sha256"):
+            return info["sha256"]
+        sha = hash_arquivo(self.video_path)
+        self.manifesto["video"] = {"tamanho": stat.st_size, "mtime": stat.st_mtime, "sha256": sha}
+        return sha
+
+    def chave(self, estagio, **parametros):
+        return hash_parametros(video=self.hash_video, estagio=estagio, **parametros)
+
+    def valido(self, estagio, chave, *saidas):
+        with self._lock:
+            gravada = self.manifesto["estagios"].get(estagio)
+        return gravada == chave and all(Path(s).exists() for s in saidas)
+
+    def registrar(self, estagio, chave):
+        with self._lock:
+            self.manifesto["estagios"][estagio] = chave
+            self._salvar()
+
+    def _salvar(self):
+        temporario = self.caminho.with_suffix(".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.manifesto, f, ensure_ascii=False, indent=4)
+        temporario.replace(self.caminho)
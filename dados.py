@@ -0,0 +1,122 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from cache_estagios import hash_arquivo, hash_codigo, hash_parametros
+
+# ============================
+# Dataset questionário + emoções
+# ============================
+# Uma única definição do PSS, da limpeza de nomes e do merge usada por todos
+# os scripts estatísticos. O resultado fica num cache binário invalidado pelo
+# hash dos CSVs de origem (e do código deste módulo).
+
+RAIZ = Path(__file__).resolve().parent
+CAMINHO_QUESTIONARIO = RAIZ / "Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv"
+CAMINHO_EMOCOES = RAIZ / "resultados" / "resumo_frequencias.csv"
+CAMINHO_CACHE = RAIZ / "resultados" / ".cache_dataset"
+
+COLUNA_NOME = "Nome completo:"
+PREFIXO_PSS = "No último mês, com que frequência"
+# Itens 4, 5, 7 e 8 da PSS-10 são positivos e têm a pontuação invertida (4 - x)
+PSS_INVERTIDOS = [3, 4, 6, 7]
+EMOCOES = ["angry", "disgust", "fear", "sad", "neutral", "happy", "surprise"]
+
+
+def clean_name(name):
+    if pd.isna(name):
+        return None
+    return str(name).lower().strip()
+
+
+def colunas_pss(df_survey):
+    # As 10 perguntas da PSS, identificadas pelo enunciado e não pela posição
+    colunas = [c for c in df_survey.columns if str(c).startswith(PREFIXO_PSS)]
+    if len(colunas) != 10:
+        raise ValueError(f"Esperava 10 itens da PSS, encontrei {len(colunas)}.")
+    return colunas
+
+
+def calcular_pss(df_survey):
+    pss_cols = colunas_pss(df_survey)
+    df_pss = df_survey[pss_cols].apply(pd.to_numeric, errors="coerce").astype("Int64")
+    for idx in PSS_INVERTIDOS:
+        df_pss[pss_cols[idx]] = 4 - df_pss[pss_cols[idx]]
+    return df_pss.sum(axis=1, skipna=True).astype("int64")
+
+
+def carregar_questionario(caminho=CAMINHO_QUESTIONARIO):
+    df_survey = pd.read_csv(caminho)
+    for col in colunas_pss(df_survey):
+        df_survey[col] = pd.to_numeric(df_survey[col], errors="coerce").astype("Int64")
+    for col in ("Idade:", "Semestre atual:"):
+        if col in df_survey.columns:
+            df_survey[col] = pd.to_numeric(df_survey[col], errors="coerce")
+    df_survey["PSS_Total"] = calcular_pss(df_survey)
+    df_survey["Nome_cleaned"] = df_survey[COLUNA_NOME].apply(clean_name)
+    return df_survey
+
+
+def carregar_emocoes(caminho=CAMINHO_EMOCOES):
+    df_emotions = pd.read_csv(caminho, sep=";")
+    for col in EMOCOES:
+        if col in df_emotions.columns:
+            df_emotions[col] = pd.to_numeric(df_emotions[col], errors="coerce").astype("float64")
+    df_emotions["Pessoa_cleaned"] = df_emotions["Pessoa"].apply(clean_name)
+    return df_emotions
+
+
+def _montar_dataset(questionario, emocoes):
+    return pd.merge(
+        carregar_questionario(questionario),
+        carregar_emocoes(emocoes),
+        left_on="Nome_cleaned",
+        right_on="Pessoa_cleaned",
+        how="inner",
+    )
+
+
+def _gravar_cache(df, caminho):
+    # Feather (pyarrow) quando disponível; senão pickle do próprio pandas
+    try:
+        df.reset_index(drop=True).to_feather(caminho.with_suffix(".feather"))
+        return "feather"
+    except ImportError:
+        df.to_pickle(caminho.with_suffix(".pkl"))
+        return "pickle"
+
+
+def _ler_cache(caminho, formato):
+    if formato == "feather":
+        return pd.read_feather(caminho.with_suffix(".feather"))
+    return pd.read_pickle(caminho.with_suffix(".pkl"))
+
+
+def carregar_dataset(questionario=CAMINHO_QUESTIONARIO, emocoes=CAMINHO_EMOCOES, usar_cache=True,
+                     cache=CAMINHO_CACHE):
+    questionario, emocoes, cache = Path(questionario), Path(emocoes), Path(cache)
+    chave = hash_parametros(
+        questionario=hash_arquivo(questionario),
+        emocoes=hash_arquivo(emocoes),
+        # O módulo inteiro: PSS_INVERTIDOS, clean_name etc. também decidem o dataset
+        codigo=hash_codigo("dados"),
+    )
+    meta_path = cache.with_suffix(".json")
+
+    if usar_cache and meta_path.exists():
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("chave") == chave:
+            try:
+                return _ler_cache(cache, meta["formato"])
+            except (OSError, ValueError, ImportError):
+                pass  # cache corrompido ou formato indisponível: reconstrói
+
+    df = _montar_dataset(questionario, emocoes)
+    if usar_cache:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        formato = _gravar_cache(df, cache)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"chave": chave, "formato": formato}, f, indent=4)
+    return df
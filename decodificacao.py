@@ -0,0 +1,180 @@
+import json
+import tempfile
+import subprocess
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+# ============================
+# Metadados (ffprobe)
+# ============================
+def sondar_video(video_path):
+    # Duração, fps, resolução e rotação lidos do container, sem abrir um decodificador
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames,duration"
+                         ":stream_tags=rotate:stream_side_data=rotation:format=duration",
+        "-of", "json",
+        str(video_path),
+    ]
+    info = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+    stream = (info.get("streams") or [{}])[0]
+
+    fps = 0.0
+    for campo in ("avg_frame_rate", "r_frame_rate"):
+        valor = stream.get(campo, "0/0")
+        if valor and not valor.endswith("/0"):
+            fps = float(Fraction(valor))
+            if fps > 0:
+                break
+
+    duracao = stream.get("duration") or info.get("format", {}).get("duration")
+    duracao = float(duracao) if duracao not in (None, "N/A") else 0.0
+    n_frames = stream.get("nb_frames")
+    n_frames = int(n_frames) if n_frames not in (None, "N/A") else int(round(duracao * fps))
+
+    # Celulares gravam em paisagem e marcam a rotação nos metadados (side data
+    # nas versões novas, tag "rotate" nas antigas)
+    rotacao = stream.get("tags", {}).get("rotate")
+    for dados in stream.get("side_data_list") or []:
+        if "rotation" in dados:
+            rotacao = dados["rotation"]
+    rotacao = int(float(rotacao)) % 360 if rotacao not in (None, "") else 0
+
+    return {
+        "duracao": duracao,
+        "fps": fps,
+        "largura": int(stream.get("width", 0)),
+        "altura": int(stream.get("height", 0)),
+        "n_frames": n_frames,
+        "rotacao": rotacao,
+    }
+
+
+def tempos_keyframes(video_path):
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time,best_effort_timestamp_time",
+        "-of", "csv=p=0",
+        str(video_path),
+    ]
+    saida = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    tempos = []
+    for linha in saida.splitlines():
+        valores = [v for v in linha.split(",") if v and v != "N/A"]
+        if valores:
+            tempos.append(float(valores[0]))
+    return sorted(tempos)
+
+
+# ============================
+# Decodificação via pipe
+# ============================
+@lru_cache(maxsize=None)
+def _opcao_passthrough():
+    # -fps_mode existe a partir do ffmpeg 5.1; antes disso a mesma opção se chama -vsync
+    ajuda = subprocess.run(["ffmpeg", "-hide_banner", "-h", "long"], capture_output=True, text=True).stdout
+    return ["-fps_mode" if "-fps_mode" in ajuda else "-vsync", "passthrough"]
+
+
+class LeitorFFmpeg:
+    # Lê frames BGR crus do ffmpeg (rawvideo pelo stdout) já na resolução e
+    # fps pedidas. A escala e o descarte de frames acontecem dentro do ffmpeg;
+    # cada frame é lido para o mesmo buffer pré-alocado, então quem consome
+    # precisa copiar o frame se quiser guardá-lo além da iteração.
+    def __init__(self, video_path, largura=None, fps=None, somente_keyframes=False):
+        self.video_path = str(video_path)
+        self.info = sondar_video(video_path)
+        # Sem fps pedido ("todos"), a saída é reamostrada na taxa média do
+        # vídeo: em gravações VFR (celular) o muxer rawvideo duplicaria ou
+        # descartaria frames na taxa "adivinhada" (r_frame_rate), e o tempo
+        # i / fps se afastaria da transcrição ao longo da entrevista
+        self.fps = fps or self.info["fps"] or 25.0
+        self.somente_keyframes = somente_keyframes
+
+        # O ffmpeg aplica a rotação dos metadados ao decodificar: um vídeo em
+        # retrato sai com largura e altura trocadas em relação ao ffprobe
+        largura_original, altura_original = self.info["largura"], self.info["altura"]
+        if self.info["rotacao"] % 180 == 90:
+            largura_original, altura_original = altura_original, largura_original
+        self.dimensoes_decodificadas = (largura_original, altura_original)
+        if largura and largura < largura_original:
+            self.largura = int(largura) // 2 * 2
+            self.altura = int(round(altura_original * self.largura / largura_original)) // 2 * 2
+        else:
+            self.largura, self.altura = largura_original, altura_original
+
+        self.buffer = np.empty((self.altura, self.largura, 3), dtype=np.uint8)
+
+    def _comando(self):
+        cmd = ["ffmpeg", "-v", "error", "-nostdin"]
+        if self.somente_keyframes:
+            cmd += ["-skip_frame", "nokey"]
+        cmd += ["-i", self.video_path, "-an", "-sn"]
+
+        filtros = []
+        if not self.somente_keyframes:
+            filtros.append(f"fps={self.fps}")
+        if (self.largura, self.altura) != self.dimensoes_decodificadas:
+            filtros.append(f"scale={self.largura}:{self.altura}:flags=area")
+        if filtros:
+            cmd += ["-vf", ",".join(filtros)]
+        if self.somente_keyframes:
+            cmd += _opcao_passthrough()
+
+        cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        return cmd
+
+    def _tempos(self):
+        if self.somente_keyframes:
+            yield from tempos_keyframes(self.video_path)
+            return
+        i = 0
+        while True:
+            yield i / self.fps
+            i += 1
+
+    def _ler_frame(self, saida, visao):
+        lidos = 0
+        while lidos < len(visao):
+            n = saida.readinto(visao[lidos:])
+            if not n:
+                return False
+            lidos += n
+        return True
+
+    def __iter__(self):
+        visao = memoryview(self.buffer).cast("B")
+        # stderr vai para um arquivo temporário (um pipe cheio travaria o ffmpeg)
+        erros = tempfile.TemporaryFile()
+        comando = self._comando()
+        processo = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=erros, bufsize=len(visao))
+        try:
+            fim_do_fluxo = False
+            for tempo in self._tempos():
+                if not self._ler_frame(processo.stdout, visao):
+                    fim_do_fluxo = True
+                    break
+                yield tempo, self.buffer
+
+            # Só o fim natural da saída diz algo sobre o ffmpeg; se paramos antes
+            # (lista de keyframes esgotada), ele é encerrado no finally
+            if fim_do_fluxo:
+                processo.stdout.close()
+                retorno = processo.wait()
+                if retorno != 0:
+                    erros.seek(0)
+                    cauda = erros.read()[-2000:].decode("utf-8", "replace").strip()
+                    raise RuntimeError(
+                        f"ffmpeg terminou com código {retorno} ao decodificar {self.video_path}: {cauda}"
+                    ) from subprocess.CalledProcessError(retorno, comando, stderr=cauda)
+        finally:
+            processo.stdout.close()
+            if processo.poll() is None:
+                processo.kill()
+                processo.wait()
+            erros.close()
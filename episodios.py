@@ -0,0 +1,230 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from linha_do_tempo import EMOCOES, N_EMOCOES, CODIGO_INDEFINIDO, como_linha, ler_linha, salvar_linha, pesos_tempo
+
+# ============================
+# Episódios emocionais
+# ============================
+# Os rótulos por frame oscilam de um frame para o outro. Aqui a linha do tempo
+# é suavizada (maioria em janela deslizante ou Viterbi sobre um HMM simples) e
+# depois comprimida por run-length em episódios: trechos contínuos com a mesma
+# emoção. Um vídeo de dezenas de milhares de frames vira algumas centenas de
+# episódios, gravados num .npy estruturado ao lado da linha do tempo:
+#   inicio, fim     float32  (s; fim = início do frame seguinte, com lacunas limitadas)
+#   codigo          uint8    (MAP_EMOCOES; 255 = indefinido/sem rosto)
+#   n_frames        uint32
+#   confianca       float16  (média da confiança da detecção do rosto)
+#   probabilidade   float16  (média da probabilidade da emoção do episódio; NaN sem probabilidades)
+DTYPE_EPISODIO = np.dtype([
+    ("inicio", "<f4"), ("fim", "<f4"), ("codigo", "u1"), ("n_frames", "<u4"),
+    ("confianca", "<f2"), ("probabilidade", "<f2"),
+])
+METODOS_SUAVIZACAO = ("maioria", "viterbi", "nenhuma")
+N_ESTADOS = N_EMOCOES + 1  # emoções + indefinido (último estado)
+
+
+def _estados(codigos):
+    # 0..6 = emoções, 7 = indefinido
+    return np.minimum(np.asarray(codigos, dtype=np.int64), N_EMOCOES)
+
+
+# ----------------------------
+# Suavização
+# ----------------------------
+def suavizar_maioria(codigos, janela=5):
+    # Moda em janela centrada de `janela` frames, com somas acumuladas de
+    # one-hot: O(frames) sem laço em Python. Empates mantêm o rótulo original.
+    estados = _estados(codigos)
+    n = estados.size
+    if janela <= 1 or n == 0:
+        return estados
+    meia = int(janela) // 2
+    acumulado = np.zeros((n + 1, N_ESTADOS), dtype=np.int32)
+    np.cumsum(np.eye(N_ESTADOS, dtype=np.int32)[estados], axis=0, out=acumulado[1:])
+    indices = np.arange(n)
+    votos = (acumulado[np.minimum(indices + meia + 1, n)] - acumulado[np.maximum(indices - meia, 0)]).astype(np.float32)
+    votos[indices, estados] += 0.5
+    return votos.argmax(axis=1)
+
+
+def _log_emissao(linha, acerto=0.8, piso=1e-4):
+    # log P(observação | estado) por frame, (n, N_ESTADOS). Com probabilidades
+    # do modelo, usa a própria distribuição; sem elas, o rótulo observado
+    # recebe `acerto` e o resto é dividido entre os demais estados. Um frame
+    # sem rosto diz pouco sobre a emoção: perdas curtas do rosto não quebram o
+    # episódio, só sequências longas viram "indefinido".
+    estados = _estados(linha["codigo"])
+    n = estados.size
+    sem_rosto = estados == N_EMOCOES
+    if "probabilidades" in linha.dtype.names:
+        probs = np.asarray(linha["probabilidades"], dtype=np.float64)
+        probs = probs / np.maximum(probs.sum(axis=1, keepdims=True), 1e-12)
+        emissao = np.empty((n, N_ESTADOS))
+        emissao[:, :N_EMOCOES] = probs * (1 - piso)
+        emissao[:, N_EMOCOES] = piso
+    else:
+        emissao = np.full((n, N_ESTADOS), (1 - acerto) / (N_ESTADOS - 1))
+        emissao[np.arange(n), estados] = acerto
+    emissao[sem_rosto, :N_EMOCOES] = (1 - acerto) / N_EMOCOES
+    emissao[sem_rosto, N_EMOCOES] = acerto
+    return np.log(np.maximum(emissao, piso * piso))
+
+
+def suavizar_viterbi(linha, permanencia=0.95, acerto=0.8):
+    # Caminho mais provável num HMM em que cada frame fica na mesma emoção com
+    # probabilidade `permanencia` e troca para qualquer outra com o restante.
+    # Como as trocas são uniformes, o melhor predecessor de cada estado é ele
+    # mesmo ou o melhor estado do frame anterior: guardando delta relativo ao
+    # máximo, cada passo é um argmax e quatro operações in-place sobre
+    # N_ESTADOS valores, sem a matriz de transição. O laço sobre os frames é
+    # em Python (a recursão é sequencial): ~1 s por 100 mil frames.
+    linha = como_linha(linha)
+    n = len(linha)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    emissao = _log_emissao(linha, acerto)
+    fica = np.log(permanencia)
+    troca = np.log((1 - permanencia) / (N_ESTADOS - 1))
+    limiar = troca - fica  # delta relativo acima disso: ficar vale mais que trocar
+
+    melhores = np.zeros(n, dtype=np.int64)          # melhor estado em t-1
+    mantem = np.zeros((n, N_ESTADOS), dtype=bool)   # estado em t veio dele mesmo?
+    delta = emissao[0].copy()
+    for t in range(1, n):
+        m = delta.argmax()
+        melhores[t] = m
+        delta -= delta[m]
+        np.greater_equal(delta, limiar, out=mantem[t])
+        delta += fica
+        np.maximum(delta, troca, out=delta)
+        delta += emissao[t]
+
+    caminho = np.empty(n, dtype=np.int64)
+    estado = int(delta.argmax())
+    caminho[-1] = estado
+    for t in range(n - 1, 0, -1):
+        if not mantem[t, estado]:
+            estado = int(melhores[t])
+        caminho[t - 1] = estado
+    return caminho
+
+
+# ----------------------------
+# Run-length
+# ----------------------------
+def segmentar(linha, estados=None):
+    # Comprime a linha do tempo em episódios. `estados` (0..7) são os rótulos
+    # já suavizados; sem eles, usa os rótulos originais de cada frame.
+    linha = como_linha(linha)
+    n = len(linha)
+    if n == 0:
+        return np.zeros(0, dtype=DTYPE_EPISODIO)
+    tempos = np.asarray(linha["tempo"], dtype=np.float64)
+    estados = _estados(linha["codigo"] if estados is None else estados)
+
+    inicios = np.flatnonzero(np.concatenate([[True], estados[1:] != estados[:-1]]))
+    fins = np.append(inicios[1:], n)
+    n_frames = fins - inicios
+
+    episodios = np.zeros(len(inicios), dtype=DTYPE_EPISODIO)
+    episodios["inicio"] = tempos[inicios]
+    episodios["fim"] = (tempos + pesos_tempo(tempos))[fins - 1]
+    episodios["codigo"] = np.where(estados[inicios] < N_EMOCOES, estados[inicios], CODIGO_INDEFINIDO)
+    episodios["n_frames"] = n_frames
+    confianca = np.asarray(linha["confianca"], dtype=np.float64)
+    episodios["confianca"] = np.add.reduceat(confianca, inicios) / n_frames
+
+    if "probabilidades" in linha.dtype.names:
+        probs = np.asarray(linha["probabilidades"], dtype=np.float64)
+        probs = probs / np.maximum(probs.sum(axis=1, keepdims=True), 1e-12)
+        # Probabilidade que o modelo deu, em cada frame, à emoção do episódio
+        propria = probs[np.arange(n), np.minimum(estados, N_EMOCOES - 1)]
+        media = np.add.reduceat(propria, inicios) / n_frames
+        episodios["probabilidade"] = np.where(estados[inicios] < N_EMOCOES, media, np.nan)
+    else:
+        episodios["probabilidade"] = np.nan
+    return episodios
+
+
+def episodios_da_linha(linha, metodo="viterbi", janela=5, permanencia=0.95):
+    linha = como_linha(linha)
+    if metodo == "maioria":
+        estados = suavizar_maioria(linha["codigo"], janela)
+    elif metodo == "viterbi":
+        estados = suavizar_viterbi(linha, permanencia)
+    elif metodo == "nenhuma":
+        estados = None
+    else:
+        raise ValueError(f"Método de suavização desconhecido: {metodo!r} (use {', '.join(METODOS_SUAVIZACAO)})")
+    return segmentar(linha, estados)
+
+
+# ----------------------------
+# Consultas
+# ----------------------------
+def por_intervalo(episodios, inicios, fins, campo="duracao"):
+    # Quanto de cada emoção cai em cada intervalo [inicio, fim], (n, N_EMOCOES).
+    # campo="duracao" dá segundos; campo="n_frames" dá frames (proporcionais à
+    # sobreposição). Cada episódio é espalhado uniformemente na sua duração e
+    # a integral acumulada é lida por busca binária nos dois extremos.
+    inicio = np.asarray(episodios["inicio"], dtype=np.float64)
+    fim = np.asarray(episodios["fim"], dtype=np.float64)
+    duracao = fim - inicio
+    codigos = np.asarray(episodios["codigo"], dtype=np.int64)
+    validos = codigos < N_EMOCOES
+    valores = duracao if campo == "duracao" else np.asarray(episodios[campo], dtype=np.float64)
+
+    m = len(episodios)
+    contribuicao = np.zeros((m, N_EMOCOES))
+    contribuicao[np.flatnonzero(validos), codigos[validos]] = valores[validos]
+    acumulado = np.zeros((m + 1, N_EMOCOES))
+    np.cumsum(contribuicao, axis=0, out=acumulado[1:])
+
+    def integral(instantes):
+        instantes = np.asarray(instantes, dtype=np.float64)
+        if m == 0:
+            return np.zeros((instantes.size, N_EMOCOES))
+        i = np.searchsorted(inicio, instantes, side="right") - 1
+        dentro = i >= 0
+        i = np.maximum(i, 0)
+        fracao = np.clip((instantes - inicio[i]) / np.maximum(duracao[i], 1e-12), 0.0, 1.0) * dentro
+        return np.where(dentro[:, None], acumulado[i] + contribuicao[i] * fracao[:, None], 0.0)
+
+    return np.maximum(integral(fins) - integral(inicios), 0.0)
+
+
+def para_registros_episodios(episodios, incluir_indefinido=False):
+    registros = []
+    for ep in episodios:
+        codigo = int(ep["codigo"])
+        if codigo >= N_EMOCOES and not incluir_indefinido:
+            continue
+        probabilidade = float(ep["probabilidade"])
+        registros.append({
+            "inicio": round(float(ep["inicio"]), 3),
+            "fim": round(float(ep["fim"]), 3),
+            "duracao": round(float(ep["fim"] - ep["inicio"]), 3),
+            "emocao": EMOCOES[codigo] if codigo < N_EMOCOES else "indefinido",
+            "n_frames": int(ep["n_frames"]),
+            "confianca": round(float(ep["confianca"]), 3),
+            "probabilidade": None if np.isnan(probabilidade) else round(probabilidade, 3),
+        })
+    return registros
+
+
+def caminho_episodios(outdir, base):
+    return Path(outdir) / f"{base}_episodios.npy"
+
+
+if __name__ == "__main__":
+    # Gera os episódios das linhas do tempo já gravadas em resultados/
+    pasta = Path(sys.argv[1] if len(sys.argv) > 1 else "resultados")
+    metodo = sys.argv[2] if len(sys.argv) > 2 else "viterbi"
+    for caminho in sorted(pasta.glob("*/*_linha.npy")):
+        episodios = episodios_da_linha(ler_linha(caminho), metodo)
+        destino = caminho.with_name(caminho.name.replace("_linha.npy", "_episodios.npy"))
+        salvar_linha(destino, episodios)
+        print(f"✅ {destino} ({len(episodios)} episódios)")
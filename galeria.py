@@ -0,0 +1,262 @@
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from cache_estagios import hash_arquivo
+
+# ============================
+# Galeria de rostos (database/)
+# ============================
+# database/<pessoa>/<foto> vira uma matriz float32 de embeddings normalizados
+# (uma linha por foto) + uma tabela de nomes, gravadas ao lado das fotos:
+#   .galeria.npy   -> float32 (n_fotos, dimensao), linhas com norma 1
+#   .galeria.json  -> modelo, detector e, por linha, pessoa/foto/assinatura;
+#                     fotos em que nenhum rosto foi achado ficam em "sem_rosto"
+# Só fotos novas ou alteradas passam pelo modelo; a busca é um produto de
+# matrizes (similaridade de cosseno) com top-k por argpartition.
+
+EXTENSOES_FOTO = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+MODELO_PADRAO = "Facenet512"
+LIMIAR_APROXIMADO = 5000  # acima disso (em fotos), busca por IVF se aproximado=None
+
+
+def _normalizar(matriz):
+    matriz = np.asarray(matriz, dtype=np.float32)
+    if matriz.ndim == 1:
+        matriz = matriz[None, :]
+    return matriz / np.maximum(np.linalg.norm(matriz, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(similaridades, k):
+    # Índices dos k maiores valores de cada linha, em ordem decrescente
+    k = min(k, similaridades.shape[1])
+    if k <= 0:
+        return np.zeros((similaridades.shape[0], 0), dtype=np.int64)
+    indices = np.argpartition(-similaridades, k - 1, axis=1)[:, :k]
+    ordem = np.argsort(-np.take_along_axis(similaridades, indices, axis=1), axis=1)
+    return np.take_along_axis(indices, ordem, axis=1)
+
+
+# ============================
+# Busca aproximada (IVF)
+# ============================
+class IndiceIVF:
+    # Lista invertida sobre k-means: cada consulta só compara com as fotos das
+    # `sondas` listas de centróide mais próximo
+    def __init__(self, matriz, n_listas=None, iteracoes=10, semente=0):
+        n = len(matriz)
+        self.n_listas = n_listas or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(semente)
+        centroides = matriz[rng.choice(n, size=min(self.n_listas, n), replace=False)]
+        for _ in range(iteracoes):
+            atribuicao = np.argmax(matriz @ centroides.T, axis=1)
+            somas = np.zeros_like(centroides)
+            np.add.at(somas, atribuicao, matriz)
+            vazios = np.bincount(atribuicao, minlength=len(centroides)) == 0
+            somas[vazios] = centroides[vazios]
+            centroides = _normalizar(somas)
+        self.centroides = centroides
+        atribuicao = np.argmax(matriz @ centroides.T, axis=1)
+        self.ordem = np.argsort(atribuicao, kind="stable")
+        self.limites = np.searchsorted(atribuicao[self.ordem], np.arange(len(centroides) + 1))
+
+    def candidatos(self, consulta, sondas):
+        listas = _top_k(consulta[None, :] @ self.centroides.T, sondas)[0]
+        return np.concatenate([self.ordem[self.limites[l]:self.limites[l + 1]] for l in listas])
+
+
+# ============================
+# Galeria
+# ============================
+class GaleriaFaces:
+    def __init__(self, pasta="database", modelo=MODELO_PADRAO, detector_backend="opencv"):
+        self.pasta = Path(pasta)
+        self.modelo = modelo
+        self.detector_backend = detector_backend
+        self.caminho_matriz = self.pasta / ".galeria.npy"
+        self.caminho_tabela = self.pasta / ".galeria.json"
+        self.matriz = np.zeros((0, 0), dtype=np.float32)
+        self.fotos = []  # [{"pessoa", "foto", "tamanho", "mtime", "sha256"}] alinhado às linhas
+        self.sem_rosto = []  # mesmos campos + "sem_rosto": fotos puladas até o arquivo mudar
+        self._ivf = None
+
+    @property
+    def nomes(self):
+        return [f["pessoa"] for f in self.fotos]
+
+    def __len__(self):
+        return len(self.fotos)
+
+    # ----------------------------
+    # Embeddings
+    # ----------------------------
+    def embedding(self, imagem, detectar=True):
+        # `imagem`: caminho ou array BGR. Sem detecção (detectar=False) o array
+        # já deve ser o recorte do rosto, como vem do pipeline ao vivo.
+        import cv2
+        from deepface import DeepFace
+
+        if not isinstance(imagem, np.ndarray):
+            imagem = cv2.imread(str(imagem))
+            if imagem is None:
+                return None
+        representacoes = DeepFace.represent(
+            imagem,
+            model_name=self.modelo,
+            detector_backend=self.detector_backend if detectar else "skip",
+            enforce_detection=False,
+        )
+        if detectar:
+            # Sem rosto, o DeepFace devolve a imagem inteira com confiança 0
+            # (mesma regra de MotorEmocoes.detectar)
+            altura, largura = imagem.shape[:2]
+            representacoes = [
+                r for r in representacoes
+                if (r.get("face_confidence") or 0) > 0
+                and not (r["facial_area"]["w"] >= largura and r["facial_area"]["h"] >= altura)
+            ]
+        if not representacoes:
+            return None
+        # Mais de um rosto na foto: fica com o maior
+        melhor = max(representacoes, key=lambda r: r["facial_area"]["w"] * r["facial_area"]["h"])
+        return np.asarray(melhor["embedding"], dtype=np.float32)
+
+    # ----------------------------
+    # Persistência
+    # ----------------------------
+    def carregar(self):
+        if self.caminho_matriz.exists() and self.caminho_tabela.exists():
+            with open(self.caminho_tabela, "r", encoding="utf-8") as f:
+                tabela = json.load(f)
+            if (tabela.get("modelo"), tabela.get("detector")) == (self.modelo, self.detector_backend):
+                self.matriz = np.load(self.caminho_matriz, allow_pickle=False)
+                self.fotos = tabela["fotos"]
+                self.sem_rosto = tabela.get("sem_rosto", [])
+                self._ivf = None
+        return self
+
+    def salvar(self):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        np.save(self.caminho_matriz, self.matriz, allow_pickle=False)
+        with open(self.caminho_tabela, "w", encoding="utf-8") as f:
+            json.dump({"modelo": self.modelo, "detector": self.detector_backend, "fotos": self.fotos,
+                       "sem_rosto": self.sem_rosto}, f, ensure_ascii=False, indent=4)
+
+    def _listar_fotos(self):
+        return sorted(
+            p for p in self.pasta.glob("*/*")
+            if p.is_file() and p.suffix.lower() in EXTENSOES_FOTO and not p.parent.name.startswith(".")
+        )
+
+    def atualizar(self):
+        # Incremental: reaproveita as linhas de fotos sem mudança (tamanho/mtime,
+        # e o sha256 quando eles mudam) e só calcula embeddings das novas. Fotos
+        # sem rosto também são lembradas e só voltam ao modelo se mudarem.
+        anteriores = {(f["pessoa"], f["foto"]): (i, f) for i, f in enumerate(self.fotos)}
+        anteriores.update({(f["pessoa"], f["foto"]): (None, f) for f in self.sem_rosto})
+        linhas, fotos, sem_rosto, novas, alteradas = [], [], [], 0, 0
+        vistas = set()
+        for caminho in self._listar_fotos():
+            stat = caminho.stat()
+            registro = {"pessoa": caminho.parent.name, "foto": caminho.name,
+                        "tamanho": stat.st_size, "mtime": stat.st_mtime}
+            vistas.add((registro["pessoa"], registro["foto"]))
+            indice, anterior = anteriores.get((registro["pessoa"], registro["foto"]), (None, None))
+            if anterior and anterior["tamanho"] == registro["tamanho"] and anterior["mtime"] == registro["mtime"]:
+                registro["sha256"] = anterior["sha256"]
+            else:
+                registro["sha256"] = hash_arquivo(caminho)
+                alteradas += 1  # ao menos tamanho/mtime mudaram: a tabela é regravada
+
+            if anterior and anterior["sha256"] == registro["sha256"]:
+                if anterior.get("sem_rosto"):
+                    sem_rosto.append({**registro, "sem_rosto": True})
+                    continue
+                vetor = self.matriz[indice]
+            else:
+                vetor = self.embedding(caminho)
+                novas += 1
+                if vetor is None:
+                    print(f"❌ Nenhum rosto em {caminho}")
+                    sem_rosto.append({**registro, "sem_rosto": True})
+                    continue
+                vetor = _normalizar(vetor)[0]
+            linhas.append(vetor)
+            fotos.append(registro)
+
+        removidas = len(set(anteriores) - vistas)
+        self.fotos = fotos
+        self.sem_rosto = sem_rosto
+        self.matriz = np.stack(linhas).astype(np.float32) if linhas else np.zeros((0, 0), dtype=np.float32)
+        self._ivf = None
+        if novas or removidas or alteradas:
+            self.salvar()
+        return {"fotos": len(fotos), "novas": novas, "removidas": removidas, "sem_rosto": len(sem_rosto)}
+
+    # ----------------------------
+    # Busca
+    # ----------------------------
+    def buscar(self, embeddings, k=3, aproximado=None, sondas=4):
+        # Para cada embedding de consulta: [(pessoa, similaridade), ...] das k
+        # fotos mais parecidas (cosseno)
+        consultas = _normalizar(embeddings)
+        if not len(self):
+            return [[] for _ in consultas]
+        if aproximado is None:
+            aproximado = len(self) > LIMIAR_APROXIMADO
+
+        if not aproximado:
+            similaridades = consultas @ self.matriz.T
+            indices = _top_k(similaridades, k)
+            return [
+                [(self.fotos[j]["pessoa"], float(similaridades[i, j])) for j in linha]
+                for i, linha in enumerate(indices)
+            ]
+
+        if self._ivf is None:
+            self._ivf = IndiceIVF(self.matriz)
+        resultados = []
+        for consulta in consultas:
+            candidatos = self._ivf.candidatos(consulta, sondas)
+            similaridades = self.matriz[candidatos] @ consulta
+            melhores = _top_k(similaridades[None, :], k)[0]
+            resultados.append([(self.fotos[candidatos[j]]["pessoa"], float(similaridades[j])) for j in melhores])
+        return resultados
+
+    def identificar(self, embeddings, limiar=0.4, **opcoes):
+        # Pessoa mais parecida de cada consulta, ou None abaixo do limiar
+        return [
+            melhores[0][0] if melhores and melhores[0][1] >= limiar else None
+            for melhores in self.buscar(embeddings, k=1, **opcoes)
+        ]
+
+    def identificar_rosto(self, recorte, limiar=0.4):
+        vetor = self.embedding(recorte, detectar=False)
+        return self.identificar(vetor, limiar)[0] if vetor is not None else None
+
+
+def abrir_galeria(pasta="database", modelo=MODELO_PADRAO, detector_backend="opencv"):
+    # Carrega o índice gravado e incorpora as fotos adicionadas desde então
+    galeria = GaleriaFaces(pasta, modelo, detector_backend).carregar()
+    galeria.atualizar()
+    return galeria
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de embeddings das fotos em database/<pessoa>/.")
+    parser.add_argument("--pasta", default="database")
+    parser.add_argument("--modelo", default=MODELO_PADRAO)
+    parser.add_argument("--detector", default="opencv")
+    parser.add_argument("--reconstruir", action="store_true", help="recalcula todos os embeddings")
+    parser.add_argument("--buscar", nargs="*", default=[], help="fotos para identificar")
+    args = parser.parse_args()
+
+    galeria = GaleriaFaces(args.pasta, args.modelo, args.detector)
+    if not args.reconstruir:
+        galeria.carregar()
+    print(f"✅ Galeria: {galeria.atualizar()}")
+    for foto in args.buscar:
+        vetor = galeria.embedding(foto)
+        print(f"🔍 {foto}: {galeria.buscar(vetor)[0] if vetor is not None else 'nenhum rosto'}")
@@ -1,26 +1,13 @@
 import pandas as pd
 import seaborn as sns
+from plotagem import salvar_figura
 import matplotlib.pyplot as plt
 
-# Load data
-df_freq = pd.read_csv("resultados/resumo_frequencias.csv", sep=";")
-df_survey = pd.read_csv("Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv")
+from dados import carregar_dataset
 
-# Clean and Merge
-df_freq['clean_name'] = df_freq['Pessoa'].str.lower().str.strip()
-df_survey['clean_name'] = df_survey['Nome completo:'].str.lower().str.strip()
-df_merged = pd.merge(df_freq, df_survey, on='clean_name', how='inner')
-
-# Calculate PSS
-pss_cols = df_survey.columns[16:26]
-pos_indices = [3, 4, 6, 7] # Indices within the pss_cols list to reverse
-
-df_merged['PSS_Score'] = 0
-for i, col in enumerate(pss_cols):
-    if i in pos_indices:
-        df_merged['PSS_Score'] += (4 - df_merged[col])
-    else:
-        df_merged['PSS_Score'] += df_merged[col]
+# Load data (questionário + emoções, mesma definição do PSS em todos os scripts)
+df_merged = carregar_dataset()
+df_merged['PSS_Score'] = df_merged['PSS_Total']
 
 # Set up the plotting style
 sns.set_theme(style="whitegrid")
@@ -49,7 +36,7 @@ axes[2].set_ylabel('Score PSS')
 
 plt.tight_layout()
 
-plt.show()
+salvar_figura("pss_vs_emocoes")
 
 # 2. PSS vs Categorical Variables
 # We will create a 2x2 grid for demographics/habits
@@ -95,7 +82,7 @@ axes[1, 1].set_xlabel('')
 axes[1, 1].tick_params(axis='x', rotation=15)
 
 plt.tight_layout()
-plt.show()
+salvar_figura("pss_por_categoria")
 
 
 
@@ -140,6 +127,6 @@ sns.despine(ax=ax_hist)
 sns.despine(ax=ax_box, left=True)
 
 plt.tight_layout()
-plt.show()
+salvar_figura("pss_descritivo")
 
 print("\nDescriptive Statistics for PSS Score:\n", stats_desc)
\ No newline at end of file
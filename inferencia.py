@@ -0,0 +1,232 @@
+import numpy as np
+import cv2
+
+# ============================
+# Configurações
+# ============================
+# Ordem das classes na saída do modelo "Emotion" do DeepFace
+EMOCOES_MODELO = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+TAMANHO_ENTRADA = 48  # o classificador de emoções trabalha com rostos 48x48 em cinza
+
+
+def _construir_modelo_emocao():
+    # A assinatura de build_model mudou entre versões do DeepFace
+    from deepface import DeepFace
+
+    try:
+        cliente = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+    except TypeError:
+        cliente = DeepFace.build_model("Emotion")
+    return getattr(cliente, "model", cliente)
+
+
+# ============================
+# Rastreamento do rosto entre frames
+# ============================
+class RastreadorFace:
+    # Roda a detecção completa a cada `intervalo_deteccao` frames (ou quando o
+    # rastreio se perde) e, entre uma detecção e outra, desloca a caixa pelo
+    # fluxo óptico (Lucas-Kanade) de pontos dentro do rosto.
+    def __init__(self, detectar, intervalo_deteccao=15, min_pontos=8):
+        self._detectar = detectar
+        self.intervalo_deteccao = intervalo_deteccao
+        self.min_pontos = min_pontos
+        self.reiniciar()
+
+    def reiniciar(self):
+        self._cinza_anterior = None
+        self._pontos = None
+        self._regiao = None
+        self._confianca = 0.0
+        self._desde_deteccao = 0
+
+    def _deteccao_completa(self, frame, cinza):
+        regiao, confianca = self._detectar(frame)
+        self._regiao = dict(regiao) if regiao is not None else None
+        self._confianca = confianca
+        self._desde_deteccao = 0
+        self._pontos = None
+        if regiao is not None:
+            mascara = np.zeros_like(cinza)
+            x, y, w, h = regiao["x"], regiao["y"], regiao["w"], regiao["h"]
+            mascara[max(y, 0):y + h, max(x, 0):x + w] = 255
+            self._pontos = cv2.goodFeaturesToTrack(cinza, maxCorners=60, qualityLevel=0.01, minDistance=5, mask=mascara)
+        return regiao, confianca, ("deteccao" if regiao is not None else "sem_rosto")
+
+    def atualizar(self, frame):
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        anterior, self._cinza_anterior = self._cinza_anterior, cinza
+
+        precisa_detectar = (
+            anterior is None
+            or self._regiao is None
+            or self._pontos is None
+            or len(self._pontos) < self.min_pontos
+            or self._desde_deteccao >= self.intervalo_deteccao
+        )
+        if precisa_detectar:
+            return self._deteccao_completa(frame, cinza)
+
+        novos, status, _ = cv2.calcOpticalFlowPyrLK(anterior, cinza, self._pontos, None)
+        ok = status.reshape(-1) == 1
+        if ok.sum() < self.min_pontos:
+            return self._deteccao_completa(frame, cinza)
+
+        deslocamento = np.median((novos[ok] - self._pontos[ok]).reshape(-1, 2), axis=0)
+        altura, largura = cinza.shape
+        r = self._regiao
+        r["x"] = int(np.clip(r["x"] + deslocamento[0], 0, max(largura - r["w"], 0)))
+        r["y"] = int(np.clip(r["y"] + deslocamento[1], 0, max(altura - r["h"], 0)))
+        self._pontos = novos[ok].reshape(-1, 1, 2)
+        self._desde_deteccao += 1
+        # A confiança decai com a fração de pontos que continuam rastreados
+        self._confianca *= float(ok.mean())
+        return dict(r), self._confianca, "rastreio"
+
+
+# ============================
+# Motor de inferência em lote
+# ============================
+class MotorEmocoes:
+    def __init__(self, detector_backend="opencv", tamanho_lote=32, intervalo_deteccao=None):
+        self.detector_backend = detector_backend
+        self.tamanho_lote = tamanho_lote
+        self._modelo = None
+        # intervalo_deteccao=None desliga o rastreamento (detecção em todo frame)
+        self.rastreador = RastreadorFace(self.detectar, intervalo_deteccao) if intervalo_deteccao else None
+
+    @property
+    def modelo(self):
+        if self._modelo is None:
+            self._modelo = _construir_modelo_emocao()
+        return self._modelo
+
+    def detectar(self, frame):
+        # Uma única detecção por frame; fica só com o maior rosto (um entrevistado)
+        from deepface import DeepFace
+
+        faces = DeepFace.extract_faces(
+            frame,
+            detector_backend=self.detector_backend,
+            enforce_detection=False,
+            align=False,
+        )
+        melhor = max(faces, key=lambda f: f["facial_area"]["w"] * f["facial_area"]["h"])
+        area = melhor["facial_area"]
+        confianca = float(melhor.get("confidence") or 0.0)
+        altura, largura = frame.shape[:2]
+        # Sem rosto, o DeepFace devolve o frame inteiro com confiança 0
+        if confianca <= 0 or (area["w"] >= largura and area["h"] >= altura):
+            return None, 0.0
+        regiao = {k: int(area[k]) for k in ("x", "y", "w", "h")}
+        return regiao, confianca
+
+    @staticmethod
+    def recortar(frame, regiao):
+        x, y, w, h = regiao["x"], regiao["y"], regiao["w"], regiao["h"]
+        rosto = frame[max(y, 0):y + h, max(x, 0):x + w]
+        if rosto.size == 0:
+            rosto = frame
+        cinza = cv2.cvtColor(rosto, cv2.COLOR_BGR2GRAY)
+        cinza = cv2.resize(cinza, (TAMANHO_ENTRADA, TAMANHO_ENTRADA), interpolation=cv2.INTER_AREA)
+        return cinza.astype(np.float32) / 255.0
+
+    def preparar(self, frame):
+        # Retorna (recorte, regiao, confianca, origem); recorte é None quando não há rosto
+        if self.rastreador is not None:
+            regiao, confianca, origem = self.rastreador.atualizar(frame)
+        else:
+            regiao, confianca = self.detectar(frame)
+            origem = "deteccao" if regiao is not None else "sem_rosto"
+        if regiao is None:
+            return None, None, 0.0, origem
+        return self.recortar(frame, regiao), regiao, confianca, origem
+
+    def classificar(self, recortes):
+        # Todos os recortes passam pelo modelo como um único tensor (N, 48, 48, 1)
+        if len(recortes) == 0:
+            return np.zeros((0, len(EMOCOES_MODELO)), dtype=np.float32)
+        probs = []
+        for inicio in range(0, len(recortes), self.tamanho_lote):
+            lote = np.stack(recortes[inicio:inicio + self.tamanho_lote])[..., np.newaxis]
+            probs.append(np.asarray(self.modelo.predict(lote, verbose=0), dtype=np.float32))
+        return np.concatenate(probs)
+
+    def resolver(self, preparados):
+        # Completa os itens devolvidos por preparar() com a classificação em lote
+        probs = iter(self.classificar([p[0] for p in preparados if p[0] is not None]))
+        return [
+            resultado_emocao(next(probs) if recorte is not None else None, regiao, confianca, origem)
+            for recorte, regiao, confianca, origem in preparados
+        ]
+
+    def analisar_lote(self, frames):
+        return self.resolver([self.preparar(frame) for frame in frames])
+
+
+class MotorRemoto(MotorEmocoes):
+    # Detecção e classificação no servidor de modelos: o cliente só decodifica
+    # os frames e nunca importa DeepFace/TensorFlow. Sem rastreamento, os
+    # frames vão em lote para /analisar_frames; com rastreamento, só as
+    # detecções completas vão ao servidor, a caixa segue pelo fluxo óptico
+    # local (cv2) e os recortes são classificados em /classificar.
+    LOTE_FRAMES = 8  # frames inteiros por requisição (cada um tem megabytes)
+
+    def __init__(self, cliente, detector_backend="opencv", tamanho_lote=32, intervalo_deteccao=None):
+        super().__init__(detector_backend, tamanho_lote, intervalo_deteccao)
+        self.cliente = cliente
+
+    @property
+    def modelo(self):
+        return None
+
+    def detectar(self, frame):
+        r = self.cliente.analisar_frames(frame[np.newaxis], self.detector_backend)[0]
+        if r["region"] is None:
+            return None, 0.0
+        return r["region"], r["face_confidence"]
+
+    def preparar(self, frame):
+        if self.rastreador is not None:
+            return super().preparar(frame)
+        # O frame vai inteiro para o servidor junto com o lote (cópia: o
+        # decodificador reaproveita o buffer)
+        return frame.copy(), None, 0.0, None
+
+    def classificar(self, recortes):
+        if len(recortes) == 0:
+            return np.zeros((0, len(EMOCOES_MODELO)), dtype=np.float32)
+        return np.asarray(self.cliente.classificar(recortes), dtype=np.float32)
+
+    def resolver(self, preparados):
+        if self.rastreador is not None:
+            return super().resolver(preparados)
+        frames = [p[0] for p in preparados]
+        resultados = []
+        for inicio in range(0, len(frames), self.LOTE_FRAMES):
+            lote = np.stack(frames[inicio:inicio + self.LOTE_FRAMES])
+            resultados.extend(self.cliente.analisar_frames(lote, self.detector_backend))
+        return resultados
+
+
+def resultado_emocao(probabilidades, regiao, confianca, origem="deteccao"):
+    # Mesmo formato de DeepFace.analyze, mais o vetor bruto de probabilidades.
+    # Frames sem rosto ficam como "indefinido" em vez de receber uma emoção padrão.
+    if probabilidades is None:
+        return {
+            "dominant_emotion": "indefinido",
+            "emotion": {},
+            "probabilidades": None,
+            "region": None,
+            "face_confidence": 0.0,
+            "origem": origem,
+        }
+    return {
+        "dominant_emotion": EMOCOES_MODELO[int(np.argmax(probabilidades))],
+        "emotion": {e: float(p) * 100 for e, p in zip(EMOCOES_MODELO, probabilidades)},
+        "probabilidades": probabilidades,
+        "region": regiao,
+        "face_confidence": confianca,
+        "origem": origem,
+    }
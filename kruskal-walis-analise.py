@@ -2,25 +2,11 @@ import pandas as pd
 from scipy import stats
 import numpy as np
 
-# Load data
-df_freq = pd.read_csv("resultados/resumo_frequencias.csv", sep=";")
-df_survey = pd.read_csv("Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv")
+from dados import carregar_dataset
 
-# Clean and Merge
-df_freq['clean_name'] = df_freq['Pessoa'].str.lower().str.strip()
-df_survey['clean_name'] = df_survey['Nome completo:'].str.lower().str.strip()
-df_merged = pd.merge(df_freq, df_survey, on='clean_name', how='inner')
-
-# Calculate PSS
-pss_cols = df_survey.columns[16:26]
-pos_indices = [3, 4, 6, 7] # Indices for items 4, 5, 7, 8 (0-indexed: 3, 4, 6, 7)
-
-df_merged['PSS_Score'] = 0
-for i, col in enumerate(pss_cols):
-    if i in pos_indices:
-        df_merged['PSS_Score'] += (4 - df_merged[col])
-    else:
-        df_merged['PSS_Score'] += df_merged[col]
+# Load data (questionário + emoções, mesma definição do PSS em todos os scripts)
+df_merged = carregar_dataset()
+df_merged['PSS_Score'] = df_merged['PSS_Total']
 
 # Inspect groups
 print("Unique Sleep Values:", df_merged['Em média, quantas horas de sono você tem por noite?'].unique())
@@ -0,0 +1,287 @@
+import sys
+import json
+from pathlib import Path
+
+import numpy as np
+
+# ============================
+# Códigos de emoção
+# ============================
+MAP_EMOCOES = {
+    "angry": 0,
+    "disgust": 1,
+    "fear": 2,
+    "sad": 3,
+    "neutral": 4,
+    "happy": 5,
+    "surprise": 6,
+    "indefinido": -1
+}
+
+# Emoções válidas na ordem dos códigos (0..6)
+EMOCOES = [e for e, idx in sorted(MAP_EMOCOES.items(), key=lambda x: x[1]) if idx >= 0]
+N_EMOCOES = len(EMOCOES)
+CODIGO_INDEFINIDO = 255  # "indefinido" (-1) guardado como uint8
+# Cores fixas por emoção (ordem de EMOCOES) + cinza para indefinido, iguais no PNG e no PDF
+CORES_EMOCOES = ["#d62728", "#8c564b", "#9467bd", "#1f77b4", "#bcbd22", "#2ca02c", "#ff7f0e", "#d9d9d9"]
+
+# De onde veio a caixa do rosto de cada frame (auditoria)
+ORIGENS = ["deteccao", "rastreio", "sem_rosto"]
+CODIGO_ORIGEM_DESCONHECIDA = 255  # registros antigos, sem o campo
+
+# ============================
+# Formato colunar
+# ============================
+# Uma linha do tempo é um array estruturado gravado em .npy, que pode ser
+# aberto com mmap sem parsear texto:
+#   tempo         float32
+#   codigo        uint8    (MAP_EMOCOES; 255 = indefinido)
+#   confianca     float16  (confiança da detecção do rosto)
+#   origem        uint8    (índice em ORIGENS; 255 = desconhecida)
+#   bbox          int16[4] (x, y, w, h do rosto; -1 sem rosto)
+#   probabilidades float16[7] (opcional, na ordem de EMOCOES)
+# Linhas gravadas antes de origem/bbox existirem continuam legíveis: quem lê
+# confere os campos presentes em dtype.names.
+DTYPE_BASE = [("tempo", "<f4"), ("codigo", "u1"), ("confianca", "<f2"), ("origem", "u1"), ("bbox", "<i2", (4,))]
+DTYPE_LINHA = np.dtype(DTYPE_BASE)
+DTYPE_LINHA_PROBS = np.dtype(DTYPE_BASE + [("probabilidades", "<f2", (N_EMOCOES,))])
+
+
+def codigo_emocao(emocao):
+    codigo = MAP_EMOCOES.get(emocao, -1)
+    return CODIGO_INDEFINIDO if codigo < 0 else codigo
+
+
+def codigo_origem(origem):
+    return ORIGENS.index(origem) if origem in ORIGENS else CODIGO_ORIGEM_DESCONHECIDA
+
+
+def para_linha(emotions, com_probabilidades=True):
+    # Converte a lista de registros de analisar_video no array colunar
+    tem_probs = com_probabilidades and any(e.get("probabilidades") for e in emotions)
+    linha = np.zeros(len(emotions), dtype=DTYPE_LINHA_PROBS if tem_probs else DTYPE_LINHA)
+    if not emotions:
+        # Nenhum frame (ex.: --emocoes-so-fala sem fala detectada)
+        return linha
+    linha["tempo"] = [e["tempo"] for e in emotions]
+    linha["codigo"] = [codigo_emocao(e["emocao"]) for e in emotions]
+    linha["confianca"] = [e.get("confianca", 1.0) or 0.0 for e in emotions]
+    linha["origem"] = [codigo_origem(e.get("origem")) for e in emotions]
+    linha["bbox"] = [e.get("bbox") or (-1, -1, -1, -1) for e in emotions]
+    if tem_probs:
+        linha["probabilidades"] = [
+            [(e.get("probabilidades") or {}).get(emo, 0.0) for emo in EMOCOES] for e in emotions
+        ]
+    return linha
+
+
+def para_registros(linha):
+    # Caminho inverso, para exportar JSON ou alimentar código que espera dicts
+    # (mesmos campos de _registro_emocao, conforme o que a linha tiver)
+    campos = linha.dtype.names
+    registros = []
+    for i in range(len(linha)):
+        codigo = int(linha["codigo"][i])
+        registro = {
+            "tempo": round(float(linha["tempo"][i]), 4),
+            "emocao": EMOCOES[codigo] if codigo < N_EMOCOES else "indefinido",
+        }
+        if "probabilidades" in campos:
+            registro["probabilidades"] = {
+                e: round(float(p), 4) for e, p in zip(EMOCOES, linha["probabilidades"][i])
+            } if codigo < N_EMOCOES else None
+        if "bbox" in campos:
+            bbox = [int(v) for v in linha["bbox"][i]]
+            registro["bbox"] = bbox if bbox[2] >= 0 else None
+        registro["confianca"] = round(float(linha["confianca"][i]), 4)
+        if "origem" in campos:
+            origem = int(linha["origem"][i])
+            registro["origem"] = ORIGENS[origem] if origem < len(ORIGENS) else None
+        registros.append(registro)
+    return registros
+
+
+def como_linha(emotions):
+    # Aceita tanto o array colunar quanto a lista de registros (dicts)
+    if isinstance(emotions, np.ndarray):
+        return emotions
+    return para_linha(emotions, com_probabilidades=False)
+
+
+def salvar_linha(caminho, linha):
+    np.save(caminho, linha, allow_pickle=False)
+
+
+def ler_linha(caminho, mmap=True):
+    return np.load(caminho, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+
+def contagens_por_intervalo(tempos, codigos, inicios, fins):
+    # Conta, para cada intervalo [inicio, fim], quantos frames de cada emoção
+    # caem nele. Busca binária nos tempos ordenados + um único bincount:
+    # O((frames + intervalos) log frames) em vez de O(frames * intervalos).
+    tempos = np.asarray(tempos, dtype=np.float64)
+    codigos = np.asarray(codigos)
+    validos = codigos < N_EMOCOES
+    tempos, codigos = tempos[validos], codigos[validos].astype(np.int64)
+    if tempos.size > 1 and np.any(np.diff(tempos) < 0):
+        ordem = np.argsort(tempos, kind="stable")
+        tempos, codigos = tempos[ordem], codigos[ordem]
+
+    inicios = np.asarray(inicios, dtype=np.float64)
+    fins = np.asarray(fins, dtype=np.float64)
+    lo = np.searchsorted(tempos, inicios, side="left")
+    hi = np.searchsorted(tempos, fins, side="right")
+    tamanhos = np.maximum(hi - lo, 0)
+
+    # Índices de todos os frames de todos os intervalos, sem laço em Python
+    total = int(tamanhos.sum())
+    deslocamentos = np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+    indices = np.arange(total) - deslocamentos + np.repeat(lo, tamanhos)
+    intervalo = np.repeat(np.arange(len(inicios)), tamanhos)
+
+    n = np.bincount(intervalo * N_EMOCOES + codigos[indices], minlength=len(inicios) * N_EMOCOES)
+    return n.reshape(len(inicios), N_EMOCOES)
+
+
+class IndiceIntervalos:
+    # Índice de contagens acumuladas por emoção sobre os frames ordenados no
+    # tempo. Construído uma vez em O(frames); cada intervalo custa duas buscas
+    # binárias e uma subtração, então milhares de palavras curtas não expandem
+    # os frames um a um.
+    def __init__(self, tempos, codigos):
+        tempos = np.asarray(tempos, dtype=np.float64)
+        codigos = np.asarray(codigos)
+        validos = codigos < N_EMOCOES
+        tempos, codigos = tempos[validos], codigos[validos].astype(np.int64)
+        ordem = np.argsort(tempos, kind="stable")
+        self.tempos = tempos[ordem]
+        self.codigos = codigos[ordem]
+        self.acumulado = np.zeros((len(self.tempos) + 1, N_EMOCOES), dtype=np.int32)
+        np.cumsum(np.eye(N_EMOCOES, dtype=np.int32)[self.codigos], axis=0, out=self.acumulado[1:])
+
+    def contar(self, inicios, fins):
+        lo = np.searchsorted(self.tempos, np.asarray(inicios, dtype=np.float64), side="left")
+        hi = np.searchsorted(self.tempos, np.asarray(fins, dtype=np.float64), side="right")
+        hi = np.maximum(hi, lo)
+        return self.acumulado[hi] - self.acumulado[lo]
+
+
+def resumo_intervalos(contagens_intervalos):
+    # Emoção dominante, número de frames e proporções de cada intervalo
+    n_frames = contagens_intervalos.sum(axis=1)
+    proporcoes = contagens_intervalos / np.maximum(n_frames, 1)[:, None]
+    dominantes = np.where(n_frames > 0, contagens_intervalos.argmax(axis=1), -1)
+    return dominantes, n_frames, proporcoes
+
+
+def pesos_tempo(tempos, fator_max=5.0):
+    # Quanto tempo cada frame representa: até o frame seguinte. Lacunas
+    # (amostragem adaptativa, trechos pulados pelo VAD) são limitadas a
+    # `fator_max` vezes o passo típico para não inflar um único frame.
+    tempos = np.asarray(tempos, dtype=np.float64)
+    if tempos.size < 2:
+        return np.ones(tempos.size)
+    dt = np.diff(tempos)
+    positivos = dt[dt > 0]
+    passo = float(np.median(positivos)) if positivos.size else 1.0
+    return np.clip(np.append(dt, passo), 0.0, fator_max * passo)
+
+
+def _entropia_normalizada(p, eixo=-1):
+    # Entropia de Shannon dividida por log(N_EMOCOES): 0 = certeza, 1 = uniforme
+    p = np.asarray(p, dtype=np.float64)
+    return -(p * np.log(np.clip(p, 1e-12, 1.0))).sum(axis=eixo) / np.log(N_EMOCOES)
+
+
+def resumo_linha(linha):
+    # Resumo de um vídeo com reduções vetorizadas sobre a linha do tempo:
+    #   participacao        -> % do tempo (com rosto) em cada emoção dominante
+    #   probabilidade_media -> média das probabilidades do modelo, ponderada pelo tempo
+    #   entropia            -> incerteza média de cada frame (0..1)
+    #   entropia_distribuicao -> quão espalhada é a participação entre emoções (0..1)
+    #   sem_rosto           -> % do tempo sem rosto detectado
+    linha = como_linha(linha)
+    codigos = np.asarray(linha["codigo"])
+    pesos = pesos_tempo(linha["tempo"])
+    validos = codigos < N_EMOCOES
+    total = float(pesos.sum())
+    tempo_emocao = np.bincount(codigos[validos].astype(np.int64), weights=pesos[validos], minlength=N_EMOCOES)
+    total_valido = float(tempo_emocao.sum())
+
+    resumo = {
+        "n_frames": int(len(linha)),
+        "duracao": round(total, 3),
+        "sem_rosto": 100 * (1 - total_valido / total) if total > 0 else 0.0,
+    }
+    if total_valido <= 0:
+        return resumo
+
+    distribuicao = tempo_emocao / total_valido
+    resumo["participacao"] = {e: 100 * float(v) for e, v in zip(EMOCOES, distribuicao)}
+    resumo["entropia_distribuicao"] = float(_entropia_normalizada(distribuicao))
+
+    if "probabilidades" in linha.dtype.names:
+        probs = np.asarray(linha["probabilidades"][validos], dtype=np.float64)
+        probs /= np.maximum(probs.sum(axis=1, keepdims=True), 1e-12)
+        w = pesos[validos] / pesos[validos].sum()
+        resumo["probabilidade_media"] = {e: 100 * float(v) for e, v in zip(EMOCOES, w @ probs)}
+        resumo["entropia"] = float(w @ _entropia_normalizada(probs))
+    return resumo
+
+
+# Modos de desenho da linha do tempo (PNG de salvar_grafico e gráfico vetorial do PDF)
+MODOS_GRAFICO = ("area", "faixa", "linha")
+
+
+def proporcoes_por_janela(tempos, codigos, n_janelas=600, duracao=None, suavizacao=1):
+    # Reduz a linha do tempo a n_janelas faixas de largura fixa, com a
+    # proporção de cada emoção (última coluna = indefinido) por faixa. O custo
+    # de desenhar depende só de n_janelas, não do número de frames.
+    tempos = np.asarray(tempos, dtype=np.float64)
+    codigos = np.minimum(np.asarray(codigos, dtype=np.int64), N_EMOCOES)
+    if duracao is None:
+        duracao = float(tempos.max()) if tempos.size else 0.0
+    duracao = max(duracao, 1e-6)
+    n_janelas = max(int(n_janelas), 1)
+
+    janela = np.minimum((tempos / duracao * n_janelas).astype(np.int64), n_janelas - 1)
+    n = np.bincount(janela * (N_EMOCOES + 1) + codigos, minlength=n_janelas * (N_EMOCOES + 1))
+    n = n.reshape(n_janelas, N_EMOCOES + 1).astype(np.float64)
+
+    # Média móvel (em janelas) sobre as contagens, antes de normalizar. Por
+    # somas acumuladas: a saída tem sempre n_janelas linhas, mesmo com
+    # `suavizacao` maior que o número de janelas (vídeos curtos)
+    if suavizacao > 1:
+        k = int(suavizacao)
+        acumulado = np.zeros((n_janelas + 1, N_EMOCOES + 1))
+        np.cumsum(n, axis=0, out=acumulado[1:])
+        indices = np.arange(n_janelas)
+        lo = np.maximum(indices - k // 2, 0)
+        hi = np.minimum(indices + (k - 1) // 2 + 1, n_janelas)
+        n = (acumulado[hi] - acumulado[lo]) / k
+
+    n_frames = n.sum(axis=1)
+    proporcoes = n / np.maximum(n_frames, 1e-12)[:, None]
+    bordas = np.linspace(0.0, duracao, n_janelas + 1)
+    return bordas, proporcoes, n_frames
+
+
+def caminho_linha(outdir, base):
+    return Path(outdir) / f"{base}_linha.npy"
+
+
+def converter_detalhado(caminho_json):
+    # Gera o .npy a partir de um <base>_detalhado.json antigo
+    caminho_json = Path(caminho_json)
+    with open(caminho_json, "r", encoding="utf-8") as f:
+        emotions = json.load(f)
+    destino = caminho_json.with_name(caminho_json.name.replace("_detalhado.json", "_linha.npy"))
+    salvar_linha(destino, para_linha(emotions))
+    return destino
+
+
+if __name__ == "__main__":
+    pasta = Path(sys.argv[1] if len(sys.argv) > 1 else "resultados")
+    for caminho in sorted(pasta.glob("*/*_detalhado.json")):
+        print(f"✅ {converter_detalhado(caminho)}")
@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# ============================
+# Subsistema de gráficos
+# ============================
+# Sempre Agg (sem janela): os scripts gravam as figuras em disco em vez de
+# bloquear em plt.show(), o que permite rodar tudo em lote/sem monitor.
+matplotlib.use("Agg", force=True)
+
+RAIZ = Path(__file__).resolve().parent
+PASTA_FIGURAS = RAIZ / "resultados" / "figuras"
+FORMATOS = ("png", "svg", "pdf")
+
+# Padrões globais; a CLI (rp2.py) ajusta via configurar() antes de rodar os scripts
+opcoes = {
+    "formato": os.environ.get("RP2_FORMATO_FIGURAS", "png"),
+    "dpi": int(os.environ.get("RP2_DPI_FIGURAS", "300")),
+}
+
+
+def configurar(formato=None, dpi=None):
+    if formato is not None:
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato!r} (use um de {FORMATOS})")
+        opcoes["formato"] = formato
+        os.environ["RP2_FORMATO_FIGURAS"] = formato
+    if dpi is not None:
+        opcoes["dpi"] = int(dpi)
+        os.environ["RP2_DPI_FIGURAS"] = str(int(dpi))
+
+
+def salvar_figura(nome, pasta=PASTA_FIGURAS, formato=None, dpi=None, fig=None):
+    # Substitui plt.show(): grava a figura corrente (ou `fig`) e a fecha
+    import matplotlib.pyplot as plt
+
+    formato = formato or opcoes["formato"]
+    dpi = dpi or opcoes["dpi"]
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    caminho = pasta / f"{nome}.{formato}"
+    fig = fig or plt.gcf()
+    fig.savefig(caminho, dpi=dpi, format=formato)
+    plt.close(fig)
+    print(f"✅ Figura salva: {caminho}")
+    return caminho
+
+
+def _renderizar_uma(funcao, kwargs, destino, formato, dpi):
+    import matplotlib.pyplot as plt
+
+    matplotlib.use("Agg", force=True)
+    try:
+        funcao(**kwargs)
+        destino = Path(destino)
+        return salvar_figura(destino.name, destino.parent, formato, dpi)
+    finally:
+        plt.close("all")
+
+
+def renderizar(tarefas, workers=None, formato=None, dpi=None):
+    # tarefas: lista de (funcao, kwargs, destino_sem_extensao). Cada função
+    # desenha uma figura independente com pyplot; as figuras são renderizadas
+    # em processos separados (o estado do pyplot não é compartilhado).
+    formato = formato or opcoes["formato"]
+    dpi = dpi or opcoes["dpi"]
+    workers = workers or min(len(tarefas), os.cpu_count() or 1)
+
+    if workers <= 1 or len(tarefas) <= 1:
+        return [_renderizar_uma(f, kw, d, formato, dpi) for f, kw, d in tarefas]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [executor.submit(_renderizar_uma, f, kw, d, formato, dpi) for f, kw, d in tarefas]
+        return [futuro.result() for futuro in futuros]
@@ -1,50 +1,23 @@
 import pandas as pd
 import numpy as np
 
-# =================================================================
-# 1. CARREGAMENTO DOS DADOS
-# =================================================================
-df_emotions = pd.read_csv("resultados/resumo_frequencias.csv", sep=";")
-df_survey = pd.read_csv("Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv")
+from dados import carregar_questionario, carregar_dataset
 
 # =================================================================
-# 2. LIMPEZA E CÁLCULO PSS TOTAL
+# 1. CARREGAMENTO DOS DADOS (PSS já calculado)
 # =================================================================
-def clean_name(name):
-    if pd.isna(name):
-        return None
-    return str(name).lower().strip()
-
-# PSS Total Calculation
-pss_cols = df_survey.columns[-10:].tolist()
-def reverse_score(series): return 4 - series
-df_pss = df_survey[pss_cols].copy()
-for col in pss_cols:
-    df_pss[col] = pd.to_numeric(df_pss[col], errors='coerce').astype('Int64') 
-reverse_indices = [3, 4, 6, 7] 
-for idx in reverse_indices:
-    if idx < len(pss_cols):
-        col_name = pss_cols[idx]
-        df_pss[col_name] = reverse_score(df_pss[col_name])
-df_survey['PSS_Total'] = df_pss.sum(axis=1, skipna=True)
+df_survey = carregar_questionario()
 meu_df = df_survey[df_survey['PSS_Total'] == 2]
 print(meu_df["Nome completo:"].to_string())
+
+df_analysis = carregar_dataset()
+
+# =================================================================
+# 2. EMOÇÃO PREDOMINANTE
+# =================================================================
 # Emotion Predominant Calculation (without neutral)
 emotion_cols_without_neutral = ['sad', 'fear', 'surprise', 'happy', 'angry', 'disgust']
-df_emotions['Predominant_Emotion'] = df_emotions[emotion_cols_without_neutral].idxmax(axis=1)
-
-# Merge
-df_survey.rename(columns={'Nome completo:': 'Nome'}, inplace=True)
-df_survey['Nome_cleaned'] = df_survey['Nome'].apply(clean_name)
-df_emotions['Pessoa_cleaned'] = df_emotions['Pessoa'].apply(clean_name)
-
-df_analysis = pd.merge(
-    df_survey,
-    df_emotions[['Pessoa_cleaned', 'Predominant_Emotion']],
-    left_on='Nome_cleaned',
-    right_on='Pessoa_cleaned',
-    how='inner'
-)
+df_analysis['Predominant_Emotion'] = df_analysis[emotion_cols_without_neutral].idxmax(axis=1)
 
 # =================================================================
 # 3. NOVAS CATEGORIZAÇÕES
@@ -5,49 +5,22 @@ import statsmodels.formula.api as smf
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 
+from dados import carregar_dataset
+
 # =================================================================
 # 1. CARREGAMENTO E PREPARAÇÃO DOS DADOS (REPETIÇÃO NECESSÁRIA)
 # =================================================================
-df_emotions = pd.read_csv("resultados/resumo_frequencias.csv", sep=";")
-df_survey = pd.read_csv("Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv")
-
-def clean_name(name):
-    if pd.isna(name): return None
-    return str(name).lower().strip()
-
-# PSS Total Calculation
-pss_cols = df_survey.columns[-10:].tolist()
-def reverse_score(series): return 4 - series
-df_pss = df_survey[pss_cols].copy()
-for col in pss_cols:
-    df_pss[col] = pd.to_numeric(df_pss[col], errors='coerce').astype('Int64') 
-reverse_indices = [3, 4, 6, 7] 
-for idx in reverse_indices:
-    if idx < len(pss_cols):
-        col_name = pss_cols[idx]
-        df_pss[col_name] = reverse_score(df_pss[col_name])
-df_survey['PSS_Total'] = df_pss.sum(axis=1, skipna=True)
-
-# Merge preparation
-df_survey.rename(columns={'Nome completo:': 'Nome'}, inplace=True)
-df_survey['Nome_cleaned'] = df_survey['Nome'].apply(clean_name)
-df_emotions['Pessoa_cleaned'] = df_emotions['Pessoa'].apply(clean_name)
+df_analysis = carregar_dataset()
 
 # Colunas base para a Regressão
 reg_cols_base = ['PSS_Total', 'Idade:', 'Nome_cleaned']
 # Colunas adicionais a serem incluídas no modelo estendido (para serem transformadas em dummy)
 new_reg_cols = ['Sexo:', 'Você já fez/faz acompanhamento terapêutico?', 'Você já foi diagnosticado com algum transtorno de saúde mental?']
 
-# Merge df_survey (PSS, Idade, Novas Variáveis) and df_emotions (Frequencies)
+# Questionário (PSS, Idade, Novas Variáveis) + emoções (Frequências)
 emotion_cols = ['sad', 'fear', 'surprise', 'happy', 'angry', 'disgust', 'Pessoa_cleaned']
 
-df_reg_emotions = pd.merge(
-    df_survey[reg_cols_base + new_reg_cols],
-    df_emotions[emotion_cols],
-    left_on='Nome_cleaned',
-    right_on='Pessoa_cleaned',
-    how='inner'
-)
+df_reg_emotions = df_analysis[reg_cols_base + new_reg_cols + emotion_cols].copy()
 
 # Renomear e limpar colunas
 col_map = {
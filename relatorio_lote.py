@@ -1,37 +1,43 @@
 import os
 import json
+import time
+import signal
+import threading
+import argparse
 import subprocess
+import multiprocessing
+from importlib import metadata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from collections import Counter
 
-import matplotlib.pyplot as plt
-import cv2
-from deepface import DeepFace
-import whisper
-
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle
+import numpy as np
+
+# Dependências pesadas (cv2, DeepFace, Whisper, matplotlib, reportlab) são
+# importadas dentro das funções que as usam: importar este módulo, ou só
+# regerar um PDF, não carrega TensorFlow/PyTorch.
+from servidor_modelos import ClienteModelos, ENDERECO_PADRAO
+from cache_estagios import CacheEstagios, hash_codigo
+from decodificacao import LeitorFFmpeg, tempos_keyframes
+from transcricao import segmentos_whisper, transcrever_fluxo
+from audio import carregar_audio, ler_wav, intervalos_fala, agrupar_intervalos, dentro_de_intervalos
+from relatorios import gerar_pdf_report
+from linha_do_tempo import (
+    MAP_EMOCOES, EMOCOES, N_EMOCOES, CORES_EMOCOES, MODOS_GRAFICO, para_linha, para_registros, como_linha, salvar_linha, ler_linha, caminho_linha,
+    contagens_por_intervalo, resumo_intervalos, IndiceIntervalos, proporcoes_por_janela, pesos_tempo,
 )
-from reportlab.lib.styles import getSampleStyleSheet
+from episodios import METODOS_SUAVIZACAO, episodios_da_linha, por_intervalo, caminho_episodios
 
 # ============================
 # Configurações iniciais
 # ============================
-whisper_model = whisper.load_model("turbo")
-
-MAP_EMOCOES = {
-    "angry": 0,
-    "disgust": 1,
-    "fear": 2,
-    "sad": 3,
-    "neutral": 4,
-    "happy": 5,
-    "surprise": 6,
-    "indefinido": -1
-}
+WHISPER_MODELO = "turbo"
+_whisper_model = None  # carregado sob demanda (uma vez por processo)
+_motor = None  # MotorEmocoes criado no primeiro uso
+_cliente = None  # ClienteModelos, quando há um servidor de modelos ativo
+
+EXTENSOES_VIDEO = {".mp4", ".avi", ".mov", ".mkv", ".flv", ".wmv"}
 
 # ============================
 # Utilitários
@@ -48,50 +54,287 @@ def converter_para_wav(video_path: Path, wav_path: Path):
     ]
     subprocess.run(cmd, check=True)
 
-def transcrever_com_tempo(audio_path):
-    result = whisper_model.transcribe(audio_path, word_timestamps=True)
-    return [
-        {"texto": seg["text"].strip(), "inicio": seg["start"], "fim": seg["end"]}
-        for seg in result["segments"]
-    ]
+def conectar_servidor(endereco=ENDERECO_PADRAO):
+    # Usa o servidor de modelos (servidor_modelos.py) se ele estiver no ar
+    global _cliente, _motor
+    cliente = ClienteModelos(endereco)
+    if not cliente.disponivel():
+        print(f"Servidor de modelos indisponível em {endereco}; usando modelos locais.")
+        return False
+    _cliente, _motor = cliente, None
+    return True
+
+def obter_whisper():
+    global _whisper_model
+    if _whisper_model is None:
+        import whisper
+        _whisper_model = whisper.load_model(WHISPER_MODELO)
+    return _whisper_model
+
+def _whisper(audio, **opcoes):
+    # `audio`: caminho ou array float32 16 kHz
+    if _cliente is not None:
+        return _cliente.transcrever(audio, WHISPER_MODELO, word_timestamps=True, **opcoes)
+    return obter_whisper().transcribe(audio, word_timestamps=True, **opcoes)
+
+def transcrever_com_tempo(audio_path, streaming=False, intervalos=None):
+    # As palavras ficam em forma compacta: [texto, inicio, fim] por palavra
+    # `audio_path`: caminho de áudio ou o array float32 16 kHz já em memória
+    if intervalos is not None:
+        # Só os trechos de fala do VAD vão para o Whisper; os tempos de cada
+        # bloco são deslocados de volta para o tempo absoluto do vídeo
+        audio = audio_path if isinstance(audio_path, np.ndarray) else ler_wav(audio_path)
+        frases = []
+        for inicio, fim in agrupar_intervalos(intervalos):
+            trecho = audio[int(inicio * 16000):int(fim * 16000)]
+            frases.extend(segmentos_whisper(_whisper(trecho), deslocamento=inicio))
+        return frases
+    if not streaming:
+        return segmentos_whisper(_whisper(audio_path))
+    # Streaming: o áudio vem do ffmpeg em blocos e cada trecho de fala
+    # detectado pelo VAD é transcrito assim que termina
+    frases = []
+    for evento in transcrever_fluxo(audio_path, _whisper):
+        print(f"  [{evento['inicio']:7.1f}s] {evento['texto']}")
+        frases.extend(evento["segmentos"])
+    return frases
+
+def palavras_em_colunas(frases):
+    # Achata as palavras de todas as frases em colunas (uma lista por campo)
+    colunas = {"texto": [], "inicio": [], "fim": [], "frase": []}
+    for i, frase in enumerate(frases):
+        for texto, inicio, fim in frase.get("palavras", []):
+            colunas["texto"].append(texto)
+            colunas["inicio"].append(inicio)
+            colunas["fim"].append(fim)
+            colunas["frase"].append(i)
+    return colunas
+
+# Modos de amostragem de frames:
+#   "todos"      -> analisa todos os frames (comportamento original)
+#   "taxa"       -> analisa no máximo `fps_alvo` frames por segundo
+#   "keyframe"   -> analisa só os keyframes (I-frames) do vídeo
+#   "adaptativo" -> candidatos na taxa `fps_alvo`; o modelo só roda de novo
+#                   quando o frame muda mais que `limiar_mudanca`
+MODOS_AMOSTRAGEM = ("todos", "taxa", "keyframe", "adaptativo")
+
+# Decodificadores:
+#   "opencv" -> cv2.VideoCapture em resolução cheia; frames pulados só com grab()
+#   "ffmpeg" -> frames crus via pipe, já reduzidos para `largura` e na taxa pedida
+DECODIFICADORES = ("opencv", "ffmpeg")
+
+def listar_keyframes(video_path, fps):
+    return {int(round(t * fps)) for t in tempos_keyframes(video_path)}
+
+def _assinatura_frame(frame):
+    # Versão reduzida em tons de cinza, barata de comparar entre frames
+    import cv2
+    cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(cinza, (64, 36), interpolation=cv2.INTER_AREA).astype("float32")
+
+def _obter_motor(tamanho_lote, intervalo_deteccao, detector_backend="opencv"):
+    # Um motor por processo: o modelo de emoções é construído uma vez e só o
+    # rastreador é trocado/reiniciado entre vídeos
+    from inferencia import MotorEmocoes, MotorRemoto, RastreadorFace
+
+    global _motor
+    if _motor is None and _cliente is not None:
+        _motor = MotorRemoto(_cliente, detector_backend=detector_backend, tamanho_lote=tamanho_lote)
+    elif _motor is None:
+        _motor = MotorEmocoes(detector_backend=detector_backend, tamanho_lote=tamanho_lote)
+    _motor.detector_backend = detector_backend
+    _motor.tamanho_lote = tamanho_lote
+    _motor.rastreador = RastreadorFace(_motor.detectar, intervalo_deteccao) if intervalo_deteccao else None
+    return _motor
+
+def _registro_emocao(tempo, resultado):
+    # Registro por frame: emoção, probabilidades, caixa do rosto e de onde ela veio
+    # (deteccao / rastreio / sem_rosto), para auditar frames sem rosto
+    from inferencia import EMOCOES_MODELO
+
+    probs = resultado["probabilidades"]
+    regiao = resultado["region"]
+    return {
+        "tempo": tempo,
+        "emocao": resultado["dominant_emotion"],
+        "probabilidades": (
+            {e: round(float(p), 4) for e, p in zip(EMOCOES_MODELO, probs)} if probs is not None else None
+        ),
+        "bbox": [regiao["x"], regiao["y"], regiao["w"], regiao["h"]] if regiao is not None else None,
+        "confianca": round(float(resultado["face_confidence"]), 4),
+        "origem": resultado["origem"],
+    }
+
+def _descarregar_lote(motor, pendentes, emotions, ultimo):
+    # pendentes: (tempo, preparado) — preparado é None quando o frame reaproveita o último resultado
+    resultados = iter(motor.resolver([p for _, p in pendentes if p is not None]))
+    for tempo, preparado in pendentes:
+        if preparado is not None:
+            ultimo = next(resultados)
+        if ultimo is not None:
+            emotions.append(_registro_emocao(tempo, ultimo))
+    pendentes.clear()
+    return ultimo
+
+def _frames_opencv(video_path, amostragem, fps_alvo, intervalos=None):
+    import cv2
 
-def analisar_video(video_path):
     cap = cv2.VideoCapture(str(video_path))
-    emotions = []
     fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
     frame_num = 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        tempo = frame_num / fps
-        try:
-            analysis = DeepFace.analyze(frame, actions=["emotion"], enforce_detection=False)
-            dominant = analysis[0]["dominant_emotion"] if isinstance(analysis, list) else analysis["dominant_emotion"]
-            emotions.append({"tempo": tempo, "emocao": dominant})
-        except:
-            pass
+    keyframes = listar_keyframes(video_path, fps) if amostragem == "keyframe" else None
+    passo = max(fps / fps_alvo, 1.0) if amostragem in ("taxa", "adaptativo") else 1.0
+    proximo = 0.0
 
-        frame_num += 1
+    try:
+        while True:
+            # grab() só avança o stream; o frame só é decodificado em retrieve()
+            if not cap.grab():
+                break
+
+            if keyframes is not None:
+                selecionado = frame_num in keyframes
+            else:
+                selecionado = frame_num >= proximo
+
+            if selecionado and intervalos is not None:
+                # Fora dos trechos de fala: nem decodifica o frame
+                if not dentro_de_intervalos(frame_num / fps, intervalos):
+                    proximo += passo
+                    selecionado = False
+
+            if not selecionado:
+                frame_num += 1
+                continue
+
+            proximo += passo
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+
+            yield frame_num / fps, frame
+            frame_num += 1
+    finally:
+        cap.release()
+
+def _frames_ffmpeg(video_path, amostragem, fps_alvo, largura, intervalos=None):
+    # A amostragem por taxa vira o filtro fps do próprio ffmpeg
+    leitor = LeitorFFmpeg(
+        video_path,
+        largura=largura,
+        fps=fps_alvo if amostragem in ("taxa", "adaptativo") else None,
+        somente_keyframes=amostragem == "keyframe",
+    )
+    for tempo, frame in leitor:
+        if intervalos is None or dentro_de_intervalos(tempo, intervalos):
+            yield tempo, frame
+
+def analisar_video(video_path, amostragem="todos", fps_alvo=3.0, limiar_mudanca=8.0, tamanho_lote=32,
+                   intervalo_deteccao=None, detector_backend="opencv", decodificador="opencv", largura=None,
+                   intervalos=None):
+    # intervalos: (n, 2) em segundos; quando dado, só frames dentro deles são analisados
+    if amostragem not in MODOS_AMOSTRAGEM:
+        raise ValueError(f"Modo de amostragem inválido: {amostragem!r} (use um de {MODOS_AMOSTRAGEM})")
+    if decodificador not in DECODIFICADORES:
+        raise ValueError(f"Decodificador inválido: {decodificador!r} (use um de {DECODIFICADORES})")
+
+    import cv2
+
+    motor = _obter_motor(tamanho_lote, intervalo_deteccao, detector_backend)
+    if decodificador == "ffmpeg":
+        frames = _frames_ffmpeg(video_path, amostragem, fps_alvo, largura, intervalos)
+    else:
+        frames = _frames_opencv(video_path, amostragem, fps_alvo, intervalos)
 
-    cap.release()
+    emotions = []
+    ultima_assinatura = None
+    ultimo_resultado = None
+    pendentes = []
+
+    for tempo, frame in frames:
+        if amostragem == "adaptativo":
+            assinatura = _assinatura_frame(frame)
+            if ultima_assinatura is not None:
+                mudanca = float(cv2.absdiff(assinatura, ultima_assinatura).mean())
+                if mudanca < limiar_mudanca:
+                    pendentes.append((tempo, None))
+                    continue
+            ultima_assinatura = assinatura
+
+        # Detecção e recorte acontecem agora; a classificação espera o lote encher
+        pendentes.append((tempo, motor.preparar(frame)))
+        if sum(p is not None for _, p in pendentes) >= motor.tamanho_lote:
+            ultimo_resultado = _descarregar_lote(motor, pendentes, emotions, ultimo_resultado)
+
+    _descarregar_lote(motor, pendentes, emotions, ultimo_resultado)
     return emotions
 
-def combinar(frases, emotions):
+def combinar(frases, emotions, episodios=None):
+    # emocao_facial/n_frames/proporcoes vêm sempre dos frames brutos. Com
+    # episódios (linha do tempo suavizada), cada frase ganha também a emoção de
+    # maior tempo nos episódios e as proporções de tempo correspondentes.
+    inicios, fins = [f["inicio"] for f in frases], [f["fim"] for f in frases]
+    linha = como_linha(emotions)
+    n = contagens_por_intervalo(linha["tempo"], linha["codigo"], inicios, fins)
+    dominantes, n_frames, proporcoes = resumo_intervalos(n)
+    if episodios is not None:
+        suavizadas, _, proporcoes_suavizadas = resumo_intervalos(por_intervalo(episodios, inicios, fins))
+
     resultados = []
-    for frase in frases:
-        emocoes_frase = [e["emocao"] for e in emotions if frase["inicio"] <= e["tempo"] <= frase["fim"]]
-        emocao_dominante = max(set(emocoes_frase), key=emocoes_frase.count) if emocoes_frase else "indefinido"
-        resultados.append({
+    for i, (frase, dominante, total, props) in enumerate(zip(frases, dominantes, n_frames, proporcoes)):
+        resultado = {
             "texto": frase["texto"],
             "inicio": frase["inicio"],
             "fim": frase["fim"],
-            "emocao_facial": emocao_dominante
-        })
+            "emocao_facial": EMOCOES[dominante] if dominante >= 0 else "indefinido",
+            "n_frames": int(total),
+            "proporcoes": {e: round(float(p), 4) for e, p in zip(EMOCOES, props)},
+        }
+        if episodios is not None:
+            resultado["emocao_suavizada"] = EMOCOES[suavizadas[i]] if suavizadas[i] >= 0 else "indefinido"
+            resultado["proporcoes_suavizadas"] = {
+                e: round(float(p), 4) for e, p in zip(EMOCOES, proporcoes_suavizadas[i])
+            }
+        resultados.append(resultado)
     return resultados
 
+def combinar_palavras(frases, emotions):
+    # Alinhamento por palavra: cada palavra recebe a distribuição de emoções dos
+    # frames que ela cobre. Palavras mais curtas que o intervalo entre frames
+    # herdam o frame imediatamente anterior ao seu início, mas só se ele ainda
+    # "vale" naquele instante (até o frame seguinte, com o limite de lacuna de
+    # pesos_tempo) e tem rosto; depois de um trecho sem rosto ou pulado pelo
+    # VAD, a palavra fica "indefinido".
+    linha = como_linha(emotions)
+    palavras = palavras_em_colunas(frases)
+    indice = IndiceIntervalos(linha["tempo"], linha["codigo"])
+
+    n = indice.contar(palavras["inicio"], palavras["fim"])
+    vazias = np.flatnonzero(n.sum(axis=1) == 0)
+    tempos = np.asarray(linha["tempo"], dtype=np.float64)
+    codigos = np.asarray(linha["codigo"])
+    ordem = np.argsort(tempos, kind="stable")
+    tempos, codigos = tempos[ordem], codigos[ordem]
+    alcance = tempos + pesos_tempo(tempos)
+
+    inicios_vazias = np.asarray(palavras["inicio"], dtype=np.float64)[vazias]
+    anteriores = np.searchsorted(tempos, inicios_vazias, side="right") - 1
+    herda = anteriores >= 0
+    anteriores = np.maximum(anteriores, 0)
+    herda &= (inicios_vazias <= alcance[anteriores]) & (codigos[anteriores] < N_EMOCOES)
+    n[vazias[herda], codigos[anteriores[herda]].astype(np.int64)] = 1
+
+    dominantes, n_frames, proporcoes = resumo_intervalos(n)
+    n_frames[vazias] = 0  # herdadas não têm frame próprio
+    palavras.update({
+        "emocoes": EMOCOES,
+        "emocao": [EMOCOES[d] if d >= 0 else "indefinido" for d in dominantes],
+        "n_frames": n_frames.tolist(),
+        "proporcoes": np.round(proporcoes, 4).tolist(),
+    })
+    return palavras
+
 # ============================
 # Gráfico
 # ============================
@@ -99,75 +342,110 @@ def combinar(frases, emotions):
 EMOCOES_ORDENADAS = [e for e, idx in sorted(MAP_EMOCOES.items(), key=lambda x: x[1]) if MAP_EMOCOES[e] >= 0]
 Y_TICKS = [MAP_EMOCOES[e] for e in EMOCOES_ORDENADAS]
 
-def salvar_grafico(emotions, out_path):
-    tempos = [e["tempo"] for e in emotions]
-    valores = [MAP_EMOCOES.get(e["emocao"], -1) for e in emotions]
-
-    plt.figure(figsize=(12, 4))
-    plt.plot(tempos, valores, linewidth=0.8)
-
-    # ✅ Ajustar o eixo Y para mostrar nomes
-    plt.yticks(Y_TICKS, EMOCOES_ORDENADAS)
-
-    plt.xlabel("Tempo (s)")
-    plt.ylabel("Emoção")
-    plt.title("Evolução das emoções no vídeo")
-    plt.grid(axis="y", linestyle="--", alpha=0.3)
-
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
-    plt.close()
-
-# ============================
-# PDF
-# ============================
-def gerar_pdf_report(outdir: Path, base: str, freq_path: Path, combinado_path: Path, grafico_path: Path):
-    pdf_path = outdir / f"{base}_report.pdf"
-    doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm)
-    styles = getSampleStyleSheet()
-    flow = []
-
-    flow.append(Paragraph(f"Relatório — {base}", styles["Title"]))
-    flow.append(Spacer(1, 0.4*cm))
-
-    if grafico_path.exists():
-        img = RLImage(str(grafico_path))
-        max_width = A4[0] - 4*cm
-        aspect = img.imageHeight / img.imageWidth
-        img.drawWidth = max_width
-        img.drawHeight = max_width * aspect
-        flow.append(img)
-        flow.append(Spacer(1, 0.4*cm))
-
-    flow.append(Paragraph("Frequência de emoções", styles["Heading2"]))
-
-    if freq_path.exists():
-        with open(freq_path, "r", encoding="utf-8") as f:
-            freq = json.load(f)
+def salvar_grafico(emotions, out_path, dpi=150, modo="area", n_janelas=600, suavizacao=1, episodios=None):
+    # API orientada a objetos (sem o estado global do pyplot) e backend Agg:
+    # seguro em threads/workers e nunca abre janela. Com `episodios`, os modos
+    # "linha" e "faixa" desenham os episódios suavizados em vez dos frames.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import ListedColormap
+
+    linha = como_linha(emotions)
+    tempos = np.asarray(linha["tempo"])
+    codigos = np.asarray(linha["codigo"])
+
+    fig = Figure(figsize=(12, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_xlabel("Tempo (s)")
+    ax.set_title("Evolução das emoções no vídeo")
+
+    if episodios is not None and len(episodios) and modo in ("linha", "faixa"):
+        inicios = np.asarray(episodios["inicio"], dtype=np.float64)
+        fins = np.asarray(episodios["fim"], dtype=np.float64)
+        estados = np.minimum(np.asarray(episodios["codigo"], dtype=np.int64), N_EMOCOES)
+        if modo == "linha":
+            # Degraus: um segmento por episódio
+            valores = np.where(estados < N_EMOCOES, estados, MAP_EMOCOES["indefinido"])
+            ax.step(np.append(inicios, fins[-1]), np.append(valores, valores[-1]), where="post", linewidth=0.8)
+            ax.set_yticks(Y_TICKS, EMOCOES_ORDENADAS)
+            ax.set_ylabel("Emoção")
+            ax.grid(axis="y", linestyle="--", alpha=0.3)
+        else:
+            rotulos = EMOCOES + ["indefinido"]
+            for estado, (rotulo, cor) in enumerate(zip(rotulos, CORES_EMOCOES)):
+                sel = estados == estado
+                ax.broken_barh(list(zip(inicios[sel], fins[sel] - inicios[sel])), (0, 1), facecolors=cor, label=rotulo)
+            ax.set_yticks([])
+            ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize=8, frameon=False)
+        ax.set_xlim(inicios[0], fins[-1])
+    elif modo == "linha":
+        # Um ponto por frame: só faz sentido para vídeos curtos
+        valores = np.where(codigos < N_EMOCOES, codigos, MAP_EMOCOES["indefinido"])
+        ax.plot(tempos, valores, linewidth=0.8)
+
+        # ✅ Ajustar o eixo Y para mostrar nomes
+        ax.set_yticks(Y_TICKS, EMOCOES_ORDENADAS)
+        ax.set_ylabel("Emoção")
+        ax.grid(axis="y", linestyle="--", alpha=0.3)
     else:
-        freq = {}
-
-    table_data = [["Emoção", "Contagem"]] + [[k, str(v)] for k, v in sorted(freq.items(), key=lambda x: -x[1])]
-    tbl = Table(table_data)
-    tbl.setStyle(TableStyle([("GRID", (0,0), (-1,-1), 0.5, colors.grey)]))
-    flow.append(tbl)
-
-    doc.build(flow)
-    return pdf_path
+        # Linha do tempo reduzida a janelas de largura fixa: o custo de
+        # desenho e o tamanho do PNG não crescem com a duração do vídeo
+        bordas, proporcoes, n_frames = proporcoes_por_janela(
+            tempos, codigos, n_janelas=min(n_janelas, max(len(tempos), 1)), suavizacao=suavizacao,
+        )
+        rotulos = EMOCOES + ["indefinido"]
+        if modo == "area":
+            centros = (bordas[:-1] + bordas[1:]) / 2
+            ax.stackplot(centros, proporcoes.T, labels=rotulos, colors=CORES_EMOCOES, linewidth=0)
+            ax.set_ylim(0, 1)
+            ax.set_ylabel("Proporção dos frames")
+        else:
+            # Uma faixa colorida com a emoção dominante de cada janela
+            dominantes = np.where(n_frames > 0, proporcoes.argmax(axis=1), N_EMOCOES)
+            ax.imshow(dominantes[None, :], aspect="auto", interpolation="nearest",
+                      cmap=ListedColormap(CORES_EMOCOES), vmin=0, vmax=N_EMOCOES,
+                      extent=(bordas[0], bordas[-1], 0, 1))
+            ax.set_yticks([])
+            for rotulo, cor in zip(rotulos, CORES_EMOCOES):
+                ax.bar(0, 0, color=cor, label=rotulo)
+        ax.set_xlim(bordas[0], bordas[-1])
+        ax.legend(loc="upper left", bbox_to_anchor=(1.0, 1.0), fontsize=8, frameon=False)
+
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=dpi)
 
 # ============================
 # Lote
 # ============================
 
-def processar_video_unico(nome_arquivo):
-    pasta = Path("entrevistas")
+def _salvar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=4)
+
+def _ler_json(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _versao_pacote(nome):
+    try:
+        return metadata.version(nome)
+    except metadata.PackageNotFoundError:
+        return "desconhecida"
+
+def processar_video_unico(nome_arquivo, amostragem="todos", fps_alvo=3.0, tamanho_lote=32, intervalo_deteccao=None,
+                          pasta="entrevistas", detector_backend="opencv", usar_cache=True, exportar_json=False,
+                          por_palavra=False, decodificador="opencv", largura=None, modo_grafico="area",
+                          transcricao_streaming=False, vad=False, emocoes_so_fala=False,
+                          salvar_wav=False, suavizacao="nenhuma", janela_suavizacao=5):
+    pasta = Path(pasta)
     if not pasta.exists():
-        raise FileNotFoundError("Pasta 'entrevistas' não existe.")
+        raise FileNotFoundError(f"Pasta '{pasta}' não existe.")
 
     video = pasta / nome_arquivo
 
     if not video.exists():
-        raise FileNotFoundError(f"Arquivo '{nome_arquivo}' não encontrado em /entrevistas.")
+        raise FileNotFoundError(f"Arquivo '{nome_arquivo}' não encontrado em {pasta}.")
 
     base = video.stem
     print(f"\n=== PROCESSANDO: {base} ===")
@@ -175,39 +453,365 @@ def processar_video_unico(nome_arquivo):
     outdir.mkdir(parents=True, exist_ok=True)
 
     wav = outdir / f"{base}.wav"
+    npy_fala = outdir / f"{base}_fala.npy"
+    json_transcricao = outdir / f"{base}_transcricao.json"
     json_freq = outdir / f"{base}.json"
+    linha_emotions = caminho_linha(outdir, base)
+    npy_episodios = caminho_episodios(outdir, base)
+    json_emotions = outdir / f"{base}_detalhado.json"
     json_combinado = outdir / f"{base}_combinado.json"
+    json_palavras = outdir / f"{base}_palavras.json"
     grafico = outdir / f"{base}_emocoes.png"
-
-    try:
+    pdf = outdir / f"{base}_report.pdf"
+
+    # Chaves de cada estágio: entradas + parâmetros + versões de modelo + chaves anteriores
+    cache = CacheEstagios(outdir, base, video)
+    chaves = {}
+    # O código entra na chave: as funções deste arquivo que decidem o estágio
+    # (incluindo os auxiliares) e, inteiros, os módulos de que ele depende
+    chaves["wav"] = cache.chave(
+        "wav", taxa=16000, canais=1, codigo=hash_codigo(converter_para_wav, _etapa_wav, "audio", "decodificacao"),
+    )
+    chaves["fala"] = cache.chave(
+        "fala", wav=chaves["wav"], codigo=hash_codigo(_etapa_fala, "audio"),
+    )
+    chaves["transcricao"] = cache.chave(
+        "transcricao", wav=chaves["wav"], modelo=WHISPER_MODELO, versao=_versao_pacote("openai-whisper"),
+        streaming=transcricao_streaming, fala=chaves["fala"] if vad else None,
+        codigo=hash_codigo(transcrever_com_tempo, _whisper, _etapa_audio, "transcricao", "audio"),
+    )
+    chaves["emocoes"] = cache.chave(
+        "emocoes", amostragem=amostragem, fps_alvo=fps_alvo, intervalo_deteccao=intervalo_deteccao,
+        detector=detector_backend, deepface=_versao_pacote("deepface"),
+        decodificador=decodificador, largura=largura, fala=chaves["fala"] if emocoes_so_fala else None,
+        codigo=hash_codigo(
+            analisar_video, _frames_opencv, _frames_ffmpeg, _descarregar_lote, _registro_emocao, _obter_motor,
+            listar_keyframes, _assinatura_frame, "inferencia", "servidor_modelos", "decodificacao", "linha_do_tempo",
+            "audio",
+        ),
+    )
+    chaves["episodios"] = cache.chave(
+        "episodios", emocoes=chaves["emocoes"], metodo=suavizacao,
+        janela=janela_suavizacao if suavizacao == "maioria" else None,
+        codigo=hash_codigo("episodios", "linha_do_tempo"),
+    ) if suavizacao != "nenhuma" else None
+    chaves["combinado"] = cache.chave(
+        "combinado", transcricao=chaves["transcricao"], emocoes=chaves["emocoes"], episodios=chaves["episodios"],
+        codigo=hash_codigo(combinar, "episodios", "linha_do_tempo"),
+    )
+    chaves["palavras"] = cache.chave(
+        "palavras", transcricao=chaves["transcricao"], emocoes=chaves["emocoes"],
+        codigo=hash_codigo(combinar_palavras, palavras_em_colunas, "linha_do_tempo"),
+    )
+    chaves["grafico"] = cache.chave(
+        "grafico", emocoes=chaves["emocoes"], episodios=chaves["episodios"], modo=modo_grafico,
+        codigo=hash_codigo(salvar_grafico, "linha_do_tempo"),
+    )
+    # O PDF desenha o próprio gráfico (vetorial) a partir da linha do tempo, no mesmo modo do PNG
+    chaves["pdf"] = cache.chave(
+        "pdf", combinado=chaves["combinado"], emocoes=chaves["emocoes"], episodios=chaves["episodios"],
+        modo=modo_grafico, codigo=hash_codigo("relatorios", "episodios", "linha_do_tempo"),
+    )
+
+    def em_cache(estagio, *saidas):
+        return usar_cache and cache.valido(estagio, chaves[estagio], *saidas)
+
+    # O áudio é decodificado uma vez, em memória, e compartilhado entre VAD e
+    # Whisper (que podem rodar em threads diferentes)
+    audio_decodificado = {}
+    trava_audio = threading.Lock()
+
+    def obter_audio():
+        with trava_audio:
+            if "audio" not in audio_decodificado:
+                audio_decodificado["audio"] = _etapa_wav(video, wav, cache, chaves, em_cache, salvar_wav)
+            return audio_decodificado["audio"]
+
+    def obter_fala():
+        return _etapa_fala(obter_audio, npy_fala, base, cache, chaves, em_cache)
+
+    # Com --emocoes-so-fala o vídeo precisa dos trechos de fala antes de começar
+    fala_video = obter_fala() if emocoes_so_fala else None
+
+    # Áudio (ffmpeg + Whisper) e vídeo (DeepFace) são independentes até o combinar:
+    # o áudio roda numa thread enquanto a thread principal analisa os frames
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        futuro_frases = executor.submit(_etapa_audio, obter_audio, json_transcricao, base, cache, chaves, em_cache,
+                                       transcricao_streaming, obter_fala if vad else None)
+
+        if em_cache("emocoes", linha_emotions, json_freq):
+            print(f"Emoções em cache: {base}")
+            emotions = ler_linha(linha_emotions, mmap=False)
+            if exportar_json and not json_emotions.exists():
+                _salvar_json(json_emotions, para_registros(emotions))
+        else:
+            print(f"Analisando emoções: {base}")
+            emotions = analisar_video(
+                str(video), amostragem=amostragem, fps_alvo=fps_alvo, tamanho_lote=tamanho_lote,
+                intervalo_deteccao=intervalo_deteccao, detector_backend=detector_backend,
+                decodificador=decodificador, largura=largura, intervalos=fala_video,
+            )
+            print("Salvando resultados...")
+            # Frames sem rosto ("indefinido") ficam só na linha do tempo, para auditoria
+            freq = dict(Counter([e["emocao"] for e in emotions if e["emocao"] != "indefinido"]))
+            _salvar_json(json_freq, freq)
+            # Saída principal é o .npy colunar; o JSON por frame é só exportação opcional
+            emotions_lista, emotions = emotions, para_linha(emotions)
+            salvar_linha(linha_emotions, emotions)
+            if exportar_json:
+                _salvar_json(json_emotions, emotions_lista)
+            cache.registrar("emocoes", chaves["emocoes"])
+
+        # Opcional: linha do tempo suavizada e comprimida em episódios, que o
+        # combinar (campos *_suavizada), o gráfico e o PDF usam além dos frames
+        if suavizacao == "nenhuma":
+            episodios = None
+            npy_episodios.unlink(missing_ok=True)
+        elif em_cache("episodios", npy_episodios):
+            episodios = ler_linha(npy_episodios, mmap=False)
+        else:
+            episodios = episodios_da_linha(emotions, suavizacao, janela_suavizacao)
+            salvar_linha(npy_episodios, episodios)
+            cache.registrar("episodios", chaves["episodios"])
+
+        frases = futuro_frases.result()
+
+    if not em_cache("combinado", json_combinado):
+        print("Combinando dados...")
+        combinados = combinar(frases, emotions, episodios)
+        _salvar_json(json_combinado, combinados)
+        cache.registrar("combinado", chaves["combinado"])
+
+    if por_palavra and not em_cache("palavras", json_palavras):
+        print("Alinhando palavras...")
+        _salvar_json(json_palavras, combinar_palavras(frases, emotions))
+        cache.registrar("palavras", chaves["palavras"])
+
+    if not em_cache("grafico", grafico):
+        salvar_grafico(emotions, grafico, modo=modo_grafico, episodios=episodios)
+        cache.registrar("grafico", chaves["grafico"])
+
+    if not em_cache("pdf", pdf):
+        gerar_pdf_report(outdir, base, json_freq, json_combinado, grafico, linha=emotions, episodios=episodios,
+                         modo_grafico=modo_grafico)
+        cache.registrar("pdf", chaves["pdf"])
+
+    print(f"✔ Concluído: {base}")
+    return outdir
+
+def _etapa_wav(video, wav, cache, chaves, em_cache, salvar_wav=False):
+    # Áudio 16 kHz mono em float32. Por padrão vem do ffmpeg por pipe, sem
+    # passar pelo disco; o WAV só é gravado com salvar_wav (ou reaproveitado
+    # se já existir de uma execução anterior)
+    if em_cache("wav", wav):
+        return ler_wav(wav)
+    if salvar_wav:
         converter_para_wav(video, wav)
-        print(f"Analisando frases: {base}")
-        frases = transcrever_com_tempo(str(wav))
-        print(f"Analisando emoções: {base}")
-        emotions = analisar_video(str(video))
-
-        print("Salvando resultados...")
-        freq = dict(Counter([e["emocao"] for e in emotions]))
-        with open(json_freq, "w", encoding="utf-8") as f:
-            json.dump(freq, f, ensure_ascii=False, indent=4)
+        cache.registrar("wav", chaves["wav"])
+        return ler_wav(wav)
+    return carregar_audio(video)
+
+def _etapa_fala(obter_audio, npy_fala, base, cache, chaves, em_cache):
+    # Pré-passagem de VAD: trechos de fala [inicio, fim] do áudio inteiro
+    if em_cache("fala", npy_fala):
+        return np.load(npy_fala, allow_pickle=False)
+    intervalos = intervalos_fala(obter_audio())
+    np.save(npy_fala, intervalos, allow_pickle=False)
+    cache.registrar("fala", chaves["fala"])
+    total = float((intervalos[:, 1] - intervalos[:, 0]).sum()) if len(intervalos) else 0.0
+    print(f"Fala: {len(intervalos)} trecho(s), {total:.0f}s ({base})")
+    return intervalos
+
+def _etapa_audio(obter_audio, json_transcricao, base, cache, chaves, em_cache, streaming=False, obter_fala=None):
+    if em_cache("transcricao", json_transcricao):
+        print(f"Transcrição em cache: {base}")
+        return _ler_json(json_transcricao)
+
+    intervalos = obter_fala() if obter_fala is not None else None
+
+    print(f"Analisando frases: {base}")
+    frases = transcrever_com_tempo(obter_audio(), streaming=streaming, intervalos=intervalos)
+    _salvar_json(json_transcricao, frases)
+    cache.registrar("transcricao", chaves["transcricao"])
+    return frases
+
+def listar_videos(pasta="entrevistas"):
+    pasta = Path(pasta)
+    if not pasta.exists():
+        raise FileNotFoundError(f"Pasta '{pasta}' não existe.")
+    return sorted(p.name for p in pasta.iterdir() if p.suffix.lower() in EXTENSOES_VIDEO)
+
+# ----------------------------
+# Execução paralela
+# ----------------------------
+# O limite por vídeo é imposto pelo processo principal: cada worker avisa
+# (numa fila) qual vídeo começou e em que processo; quem passa do limite tem
+# o processo morto. Um sinal dentro do worker não interromperia o Whisper, que
+# roda em outra thread, e o executor de áudio esperaria por ele mesmo assim.
+_fila_inicios = None
+
+def _inicializar_worker(threads_por_worker, servidor, fila_inicios):
+    # Cada worker carrega os modelos uma única vez e reaproveita entre vídeos
+    # (ou só se conecta ao servidor de modelos, se houver um, sem importar torch)
+    global _fila_inicios
+    _fila_inicios = fila_inicios
+    if servidor and conectar_servidor(servidor):
+        return
+    import torch
+    torch.set_num_threads(threads_por_worker)
+    obter_whisper()
+    _obter_motor(32, None).modelo
+
+def _processar_no_worker(nome_arquivo, opcoes):
+    inicio = time.monotonic()
+    if _fila_inicios is not None:
+        _fila_inicios.put((nome_arquivo, os.getpid(), time.time()))
+    try:
+        processar_video_unico(nome_arquivo, **opcoes)
+        return {"video": nome_arquivo, "ok": True, "erro": None, "segundos": time.monotonic() - inicio}
+    except Exception as e:
+        erro = f"{type(e).__name__}: {e}"
+    return {"video": nome_arquivo, "ok": False, "erro": erro, "segundos": time.monotonic() - inicio}
+
+def _rodar_pool(videos, workers, contexto, initargs, timeout, opcoes, registrar):
+    # Roda um pool até terminar ou até um vídeo estourar o limite. Matar um
+    # worker quebra o pool inteiro: os vídeos interrompidos junto com ele (que
+    # não estouraram) são devolvidos para uma nova rodada; os estágios que já
+    # terminaram ficam no cache e não são refeitos.
+    fila_inicios = initargs[-1]
+    iniciados, estourados = {}, set()
+    # Avisos que sobraram de uma rodada anterior (workers já encerrados)
+    while not fila_inicios.empty():
+        fila_inicios.get()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                             initializer=_inicializar_worker, initargs=initargs) as executor:
+        futuros = {executor.submit(_processar_no_worker, v, dict(opcoes)): v for v in videos}
+        pendentes = set(futuros)
+        while pendentes:
+            prontos, pendentes = wait(pendentes, timeout=0.5 if timeout else None, return_when=FIRST_COMPLETED)
+            while not fila_inicios.empty():
+                video, pid, inicio = fila_inicios.get()
+                iniciados[video] = (pid, inicio)
+            for futuro in prontos:
+                video = futuros[futuro]
+                try:
+                    registrar(futuro.result())
+                except Exception as e:
+                    if video in estourados:
+                        segundos = time.time() - iniciados[video][1]
+                        registrar({"video": video, "ok": False, "erro": f"tempo limite de {timeout}s excedido",
+                                   "segundos": segundos})
+                    elif not isinstance(e, BrokenProcessPool):
+                        registrar({"video": video, "ok": False, "erro": f"{type(e).__name__}: {e}", "segundos": 0.0})
+                    elif estourados:
+                        # Derrubado junto com o worker que estourou o limite: tenta de novo
+                        continue
+                    else:
+                        # O worker morreu (ex.: falta de memória) antes de devolver o resultado
+                        registrar({"video": video, "ok": False, "erro": f"{type(e).__name__}: {e}", "segundos": 0.0})
+                futuros.pop(futuro)
+
+            if timeout:
+                agora = time.time()
+                for futuro in pendentes:
+                    video = futuros[futuro]
+                    if video in iniciados and video not in estourados and agora - iniciados[video][1] > timeout:
+                        estourados.add(video)
+                        try:
+                            os.kill(iniciados[video][0], signal.SIGKILL)
+                        except ProcessLookupError:
+                            pass
+        executor.shutdown(wait=True, cancel_futures=True)
+    return [v for v in futuros.values() if v not in estourados]
+
+def processar_lote(pasta="entrevistas", videos=None, workers=None, timeout=None, servidor=None, **opcoes):
+    videos = videos or listar_videos(pasta)
+    if not videos:
+        print(f"Nenhum vídeo encontrado em {pasta}.")
+        return []
+
+    cpus = os.cpu_count() or 1
+    workers = workers or max(1, min(len(videos), cpus // 2))
+    threads_por_worker = max(1, cpus // workers)
+    opcoes["pasta"] = pasta
+    print(f"Processando {len(videos)} vídeo(s) com {workers} worker(s)...")
 
-        json_emotions = str(json_freq).replace(".json", "_detalhado.json")
-        with open(json_emotions, "w", encoding="utf-8") as f:
-            json.dump(emotions, f, ensure_ascii=False, indent=4)
+    resultados = []
 
-        print("Combinando dados...")
-        combinados = combinar(frases, emotions)
-        with open(json_combinado, "w", encoding="utf-8") as f:
-            json.dump(combinados, f, ensure_ascii=False, indent=4)
+    def registrar(resultado):
+        resultados.append(resultado)
+        marca = "✔" if resultado["ok"] else "❌"
+        print(f"{marca} {resultado['video']} ({resultado['segundos']:.0f}s)")
 
-        salvar_grafico(emotions, grafico)
-        gerar_pdf_report(outdir, base, json_freq, json_combinado, grafico)
+    # "spawn" evita herdar estado de TensorFlow/PyTorch por fork
+    contexto = multiprocessing.get_context("spawn")
+    fila_inicios = contexto.Queue()
+    restantes = list(videos)
+    while restantes:
+        restantes = _rodar_pool(restantes, min(workers, len(restantes)), contexto,
+                                (threads_por_worker, servidor, fila_inicios), timeout, opcoes, registrar)
 
-        print(f"✔ Concluído: {base}")
+    imprimir_resumo(resultados)
+    return resultados
 
-    except Exception as e:
-        print(f"❌ Erro em {base}: {e}")
+def imprimir_resumo(resultados):
+    sucessos = [r for r in resultados if r["ok"]]
+    falhas = [r for r in resultados if not r["ok"]]
+    print("\n" + "=" * 30)
+    print(f"Sucessos: {len(sucessos)} | Falhas: {len(falhas)}")
+    for r in falhas:
+        print(f"❌ {r['video']}: {r['erro']}")
+    print("=" * 30)
+
+
+# ----------------------------
+# Linha de comando
+# ----------------------------
+def configurar_argumentos(parser):
+    parser.add_argument("videos", nargs="*", help="arquivos dentro da pasta (padrão: todos)")
+    parser.add_argument("--pasta", default="entrevistas")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="limite por vídeo, em segundos")
+    parser.add_argument("--amostragem", choices=MODOS_AMOSTRAGEM, default="todos")
+    parser.add_argument("--fps-alvo", type=float, default=3.0)
+    parser.add_argument("--intervalo-deteccao", type=int, default=None)
+    parser.add_argument("--detector", dest="detector_backend", default="opencv",
+                        help="detector de rostos do DeepFace (opencv, retinaface, mtcnn, ...)")
+    parser.add_argument("--sem-cache", action="store_true", help="recalcula todos os estágios")
+    parser.add_argument("--exportar-json", action="store_true", help="grava também o <base>_detalhado.json")
+    parser.add_argument("--por-palavra", action="store_true", help="grava o alinhamento por palavra")
+    parser.add_argument("--decodificador", choices=DECODIFICADORES, default="opencv")
+    parser.add_argument("--largura", type=int, default=None, help="largura de decodificação (só ffmpeg)")
+    parser.add_argument("--transcricao-streaming", action="store_true",
+                        help="transcreve trecho a trecho (VAD) e mostra o texto enquanto processa")
+    parser.add_argument("--salvar-wav", action="store_true", help="grava também o <base>.wav em resultados/")
+    parser.add_argument("--vad", action="store_true", help="transcreve só os trechos com fala")
+    parser.add_argument("--emocoes-so-fala", action="store_true",
+                        help="analisa o rosto só nos frames dentro dos trechos com fala")
+    parser.add_argument("--grafico", dest="modo_grafico", choices=MODOS_GRAFICO, default="area",
+                        help="área empilhada ou faixa por janela de tempo; 'linha' desenha um ponto por frame "
+                             "(com --suavizacao, 'faixa' e 'linha' desenham os episódios)")
+    parser.add_argument("--suavizacao", choices=METODOS_SUAVIZACAO, default="nenhuma",
+                        help="agrupa a linha do tempo suavizada em episódios (<base>_episodios.npy); "
+                             "os rótulos por frame continuam sendo os principais")
+    parser.add_argument("--janela-suavizacao", type=int, default=5, help="frames da janela (só maioria)")
+    parser.add_argument("--servidor", nargs="?", const=ENDERECO_PADRAO, default=None,
+                        help="usa o servidor de modelos (servidor_modelos.py) neste endereço")
+    return parser
+
+def executar(args):
+    resultados = processar_lote(
+        args.pasta, args.videos, workers=args.workers, timeout=args.timeout, servidor=args.servidor,
+        amostragem=args.amostragem, fps_alvo=args.fps_alvo, intervalo_deteccao=args.intervalo_deteccao,
+        detector_backend=args.detector_backend,
+        usar_cache=not args.sem_cache, exportar_json=args.exportar_json, por_palavra=args.por_palavra,
+        decodificador=args.decodificador, largura=args.largura, modo_grafico=args.modo_grafico,
+        transcricao_streaming=args.transcricao_streaming, vad=args.vad, emocoes_so_fala=args.emocoes_so_fala,
+        salvar_wav=args.salvar_wav, suavizacao=args.suavizacao, janela_suavizacao=args.janela_suavizacao,
+    )
+    return 0 if all(r["ok"] for r in resultados) else 1
 
 
 if __name__ == "__main__":
-    processar_video_unico("Gustavo Santos El Dib.mp4")
+    parser = configurar_argumentos(argparse.ArgumentParser(description="Processa as entrevistas em lote."))
+    raise SystemExit(executar(parser.parse_args()))
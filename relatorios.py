@@ -0,0 +1,356 @@
+import io
+import os
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from linha_do_tempo import (
+    EMOCOES, N_EMOCOES, CORES_EMOCOES, MODOS_GRAFICO, ler_linha, caminho_linha, como_linha, proporcoes_por_janela,
+)
+from episodios import caminho_episodios, para_registros_episodios, segmentar
+
+# ============================
+# Relatórios PDF
+# ============================
+# ReportLab é importado só dentro das funções. Estilos são montados uma vez
+# por processo; o gráfico entra como desenho vetorial (a partir do .npy, no
+# mesmo modo do PNG) ou, sem linha do tempo, como o PNG reduzido à largura de
+# impressão; a tabela do combinado é quebrada
+# em blocos que o ReportLab divide entre páginas.
+
+LINHAS_POR_BLOCO = 100    # linhas por Table; cada bloco é dividido entre páginas
+JANELAS_GRAFICO = 200     # faixas de tempo no gráfico vetorial
+DPI_IMAGEM = 150          # resolução máxima do PNG embutido (na largura impressa)
+
+_recursos = None
+
+
+def recursos():
+    # Folha de estilos e estilos de tabela compartilhados por todos os PDFs do processo
+    global _recursos
+    if _recursos is None:
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+
+        estilos = getSampleStyleSheet()
+        estilos.add(ParagraphStyle("Celula", parent=estilos["BodyText"], fontSize=8, leading=10))
+        _recursos = {
+            "estilos": estilos,
+            "tabela": TableStyle([
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ]),
+        }
+    return _recursos
+
+
+def _documento(pdf_path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate
+
+    doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm)
+    return doc, A4[0] - 4*cm
+
+
+def _ler_json(caminho, padrao):
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return padrao
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----------------------------
+# Gráfico
+# ----------------------------
+def grafico_vetorial(linha, largura, altura=150, modo="area", episodios=None):
+    # O mesmo gráfico de salvar_grafico (modo e episódios), desenhado com
+    # formas do próprio ReportLab: vetorial, sem PNG. "area" e "faixa" sem
+    # episódios custam no máximo JANELAS_GRAFICO faixas; "linha" desenha um
+    # degrau por trecho contínuo com a mesma emoção.
+    from reportlab.lib import colors
+    from reportlab.graphics.shapes import Drawing, Rect, String, Line, PolyLine
+
+    linha = como_linha(linha)
+    margem_x, margem_y, legenda = 30 if modo != "linha" else 45, 18, 12
+    desenho = Drawing(largura, altura)
+    area_l, area_a = largura - margem_x, altura - margem_y - legenda
+    if not len(linha):
+        return desenho
+    if episodios is not None and not len(episodios):
+        episodios = None
+
+    tempos = np.asarray(linha["tempo"], dtype=np.float64)
+    cores = [colors.HexColor(c) for c in CORES_EMOCOES]
+    if episodios is not None and modo in ("linha", "faixa"):
+        trechos = episodios
+    elif modo == "linha":
+        trechos = segmentar(linha)  # trechos da linha bruta, sem suavização
+    else:
+        trechos = None
+        bordas, proporcoes, n_frames = proporcoes_por_janela(
+            tempos, linha["codigo"], n_janelas=min(JANELAS_GRAFICO, len(linha)),
+        )
+    if trechos is not None:
+        inicios = np.asarray(trechos["inicio"], dtype=np.float64)
+        fins = np.asarray(trechos["fim"], dtype=np.float64)
+        estados = np.minimum(np.asarray(trechos["codigo"], dtype=np.int64), N_EMOCOES)
+        duracao = max(float(fins[-1]), 1e-6)
+    else:
+        duracao = max(bordas[-1], 1e-6)
+
+    def x_de(t):
+        return margem_x + t / duracao * area_l
+
+    if modo == "linha":
+        # Degraus com a emoção no eixo Y (indefinido embaixo, como no PNG)
+        niveis = np.where(estados < N_EMOCOES, estados + 1, 0)
+        passo_y = area_a / N_EMOCOES
+        pontos = []
+        for inicio, fim, nivel in zip(inicios, fins, niveis):
+            y = margem_y + nivel * passo_y
+            pontos += [x_de(inicio), y, x_de(fim), y]
+        desenho.add(PolyLine(pontos, strokeWidth=0.6, strokeColor=colors.HexColor(CORES_EMOCOES[3])))
+        for nivel, rotulo in enumerate(["indefinido"] + EMOCOES):
+            y = margem_y + nivel * passo_y
+            desenho.add(Line(margem_x, y, largura, y, strokeWidth=0.2, strokeColor=colors.lightgrey))
+            desenho.add(String(margem_x - 3, y - 2, rotulo, fontName="Helvetica", fontSize=6, textAnchor="end"))
+    elif trechos is not None:
+        # Faixa com um retângulo por episódio
+        for inicio, fim, estado in zip(inicios, fins, estados):
+            desenho.add(Rect(x_de(inicio), margem_y, x_de(fim) - x_de(inicio), area_a,
+                             fillColor=cores[estado], strokeColor=None))
+    elif modo == "faixa":
+        # Faixa com a emoção dominante de cada janela
+        dominantes = np.where(n_frames > 0, proporcoes.argmax(axis=1), N_EMOCOES)
+        for i, estado in enumerate(dominantes):
+            desenho.add(Rect(x_de(bordas[i]), margem_y, x_de(bordas[i + 1]) - x_de(bordas[i]), area_a,
+                             fillColor=cores[estado], strokeColor=None))
+    else:
+        # Área empilhada das proporções por janela
+        for i in range(len(proporcoes)):
+            x = x_de(bordas[i])
+            w = x_de(bordas[i + 1]) - x
+            y = margem_y
+            for codigo, p in enumerate(proporcoes[i]):
+                if p <= 0:
+                    continue
+                desenho.add(Rect(x, y, w, p * area_a, fillColor=cores[codigo], strokeColor=None))
+                y += p * area_a
+        for frac in (0, 0.5, 1):
+            desenho.add(String(margem_x - 3, margem_y + frac * area_a - 2, f"{frac:.0%}", fontName="Helvetica", fontSize=6, textAnchor="end"))
+
+    desenho.add(Line(margem_x, margem_y, largura, margem_y, strokeWidth=0.5))
+    for frac in (0, 0.25, 0.5, 0.75, 1):
+        x = margem_x + frac * area_l
+        desenho.add(String(x, 4, f"{frac * duracao:.0f}s", fontName="Helvetica", fontSize=6, textAnchor="middle"))
+
+    if modo != "linha":
+        x = margem_x
+        for rotulo, cor in zip(EMOCOES + ["indefinido"], cores):
+            desenho.add(Rect(x, altura - 8, 6, 6, fillColor=cor, strokeColor=None))
+            desenho.add(String(x + 8, altura - 7, rotulo, fontName="Helvetica", fontSize=6))
+            x += 10 + 4 * len(rotulo)
+    return desenho
+
+
+def imagem_reduzida(grafico_path, largura):
+    # PNG reamostrado para DPI_IMAGEM na largura impressa (o original é maior)
+    from PIL import Image
+    from reportlab.platypus import Image as RLImage
+
+    with Image.open(grafico_path) as img:
+        largura_px = int(largura / 72 * DPI_IMAGEM)
+        if img.width > largura_px:
+            img = img.resize((largura_px, round(img.height * largura_px / img.width)), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", optimize=True)
+        proporcao = img.height / img.width
+    buffer.seek(0)
+    return RLImage(buffer, width=largura, height=largura * proporcao)
+
+
+# ----------------------------
+# Tabelas
+# ----------------------------
+def tabela_em_blocos(cabecalho, linhas, larguras=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    # Em vez de uma única Table gigante (cujo layout e divisão custam mais a
+    # cada linha), gera blocos menores; cada um se divide entre páginas e
+    # repete o cabeçalho
+    from reportlab.platypus import Table
+
+    estilo = recursos()["tabela"]
+    for inicio in range(0, max(len(linhas), 1), linhas_por_bloco):
+        bloco = Table([cabecalho] + linhas[inicio:inicio + linhas_por_bloco], colWidths=larguras,
+                      repeatRows=1, splitByRow=1)
+        bloco.setStyle(estilo)
+        yield bloco
+
+
+def _linhas_combinado(combinados):
+    from reportlab.platypus import Paragraph
+    from xml.sax.saxutils import escape
+
+    celula = recursos()["estilos"]["Celula"]
+    return [
+        [f"{c['inicio']:.1f}", f"{c['fim']:.1f}", Paragraph(escape(c["texto"]), celula), c["emocao_facial"]]
+        + ([c["emocao_suavizada"]] if "emocao_suavizada" in c else [])
+        for c in combinados
+    ]
+
+
+# ----------------------------
+# Relatório por vídeo
+# ----------------------------
+def _linhas_episodios(episodios):
+    return [
+        [f"{e['inicio']:.1f}", f"{e['fim']:.1f}", f"{e['duracao']:.1f}", e["emocao"],
+         "-" if e["probabilidade"] is None else f"{100 * e['probabilidade']:.0f}%", f"{e['confianca']:.2f}"]
+        for e in para_registros_episodios(episodios)
+    ]
+
+
+def gerar_pdf_report(outdir: Path, base: str, freq_path: Path, combinado_path: Path, grafico_path: Path,
+                     freq=None, combinados=None, linha=None, episodios=None, modo_grafico="area"):
+    # freq/combinados/linha/episodios podem vir já em memória (pipeline); senão são lidos do disco
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, Spacer, PageBreak
+
+    outdir, grafico_path = Path(outdir), Path(grafico_path)
+    estilos = recursos()["estilos"]
+    pdf_path = outdir / f"{base}_report.pdf"
+    doc, largura = _documento(pdf_path)
+    flow = []
+
+    flow.append(Paragraph(f"Relatório — {base}", estilos["Title"]))
+    flow.append(Spacer(1, 0.4*cm))
+
+    # Episódios só existem quando o vídeo foi processado com --suavizacao
+    if episodios is None and caminho_episodios(outdir, base).exists():
+        episodios = ler_linha(caminho_episodios(outdir, base))
+
+    if linha is None and caminho_linha(outdir, base).exists():
+        linha = ler_linha(caminho_linha(outdir, base))
+    if linha is not None:
+        flow.append(grafico_vetorial(linha, largura, modo=modo_grafico, episodios=episodios))
+        flow.append(Spacer(1, 0.4*cm))
+    elif grafico_path.exists():
+        flow.append(imagem_reduzida(grafico_path, largura))
+        flow.append(Spacer(1, 0.4*cm))
+
+    flow.append(Paragraph("Frequência de emoções", estilos["Heading2"]))
+    if freq is None:
+        freq = _ler_json(freq_path, {})
+    flow.extend(tabela_em_blocos(["Emoção", "Contagem"], [[k, str(v)] for k, v in sorted(freq.items(), key=lambda x: -x[1])]))
+
+    linhas_episodios = _linhas_episodios(episodios) if episodios is not None else []
+    if linhas_episodios:
+        flow.append(Spacer(1, 0.4*cm))
+        flow.append(Paragraph(f"Episódios emocionais ({len(linhas_episodios)})", estilos["Heading2"]))
+        larguras = [1.5*cm, 1.5*cm, 1.7*cm, largura - 9.2*cm, 2.3*cm, 2.2*cm]
+        flow.extend(tabela_em_blocos(["Início", "Fim", "Duração", "Emoção", "Prob. média", "Confiança"],
+                                     linhas_episodios, larguras))
+
+    if combinados is None:
+        combinados = _ler_json(combinado_path, [])
+    if combinados:
+        flow.append(PageBreak())
+        flow.append(Paragraph("Frases e emoção facial", estilos["Heading2"]))
+        cabecalho = ["Início", "Fim", "Frase", "Emoção"]
+        larguras = [1.3*cm, 1.3*cm, largura - 5.2*cm, 2.6*cm]
+        if "emocao_suavizada" in combinados[0]:
+            cabecalho.append("Suavizada")
+            larguras = [1.3*cm, 1.3*cm, largura - 7.8*cm, 2.6*cm, 2.6*cm]
+        flow.extend(tabela_em_blocos(cabecalho, _linhas_combinado(combinados), larguras))
+
+    doc.build(flow)
+
+    duracao = combinados[-1]["fim"] if combinados else 0.0
+    return {"base": base, "pdf": str(pdf_path), "frequencias": freq, "n_frases": len(combinados), "duracao": duracao,
+            "n_episodios": len(linhas_episodios)}
+
+
+# ----------------------------
+# Coorte
+# ----------------------------
+def _gerar_da_pasta(pasta, modo_grafico="area"):
+    pasta = Path(pasta)
+    base = pasta.name
+    return gerar_pdf_report(
+        pasta, base, pasta / f"{base}.json", pasta / f"{base}_combinado.json", pasta / f"{base}_emocoes.png",
+        modo_grafico=modo_grafico,
+    )
+
+
+def gerar_resumo_coorte(resumos, pdf_path):
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, Spacer
+
+    estilos = recursos()["estilos"]
+    doc, largura = _documento(pdf_path)
+    resumos = sorted(resumos, key=lambda r: r["base"])
+
+    contagens = np.array([[r["frequencias"].get(e, 0) for e in EMOCOES] for r in resumos], dtype=np.float64)
+    proporcoes = contagens / np.maximum(contagens.sum(axis=1, keepdims=True), 1)
+
+    flow = [
+        Paragraph("Resumo da coorte", estilos["Title"]),
+        Paragraph(f"{len(resumos)} entrevista(s), {sum(r['n_frases'] for r in resumos)} frases, "
+                  f"{sum(r['n_episodios'] for r in resumos)} episódios emocionais, "
+                  f"{sum(r['duracao'] for r in resumos) / 60:.1f} min de fala transcrita.", estilos["BodyText"]),
+        Spacer(1, 0.4*cm),
+        Paragraph("Proporção de cada emoção por pessoa (%)", estilos["Heading2"]),
+    ]
+    cabecalho = ["Pessoa"] + EMOCOES
+    linhas = [[r["base"]] + [f"{100 * p:.1f}" for p in props] for r, props in zip(resumos, proporcoes)]
+    if len(resumos):
+        linhas.append(["Média"] + [f"{100 * p:.1f}" for p in proporcoes.mean(axis=0)])
+    larguras = [largura - N_EMOCOES * 1.6*cm] + [1.6*cm] * N_EMOCOES
+    flow.extend(tabela_em_blocos(cabecalho, linhas, larguras))
+
+    doc.build(flow)
+    return pdf_path
+
+
+def gerar_relatorios(resultados="resultados", bases=None, workers=None, coorte=True, modo_grafico="area"):
+    # Gera os PDFs de todas as pastas em paralelo; o resumo da coorte é montado
+    # com o que cada worker devolve, sem reler os resultados
+    resultados = Path(resultados)
+    bases = bases or sorted(p.name for p in resultados.iterdir() if p.is_dir() and not p.name.startswith("."))
+    pastas = [resultados / b for b in bases if (resultados / b / f"{b}.json").exists()]
+    workers = workers or min(len(pastas), os.cpu_count() or 1)
+
+    resumos = []
+    if workers <= 1:
+        for pasta in pastas:
+            resumos.append(_gerar_da_pasta(pasta, modo_grafico))
+            print(f"✅ {resumos[-1]['pdf']}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for resumo in executor.map(_gerar_da_pasta, pastas, [modo_grafico] * len(pastas)):
+                resumos.append(resumo)
+                print(f"✅ {resumo['pdf']}")
+
+    if coorte and resumos:
+        pdf = gerar_resumo_coorte(resumos, resultados / "resumo_coorte.pdf")
+        print(f"📊 {pdf}")
+    return resumos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera os PDFs de todas as entrevistas já processadas.")
+    parser.add_argument("bases", nargs="*", help="pastas em resultados/ (padrão: todas)")
+    parser.add_argument("--resultados", default="resultados")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--sem-coorte", action="store_true", help="não gera o resumo_coorte.pdf")
+    parser.add_argument("--grafico", dest="modo_grafico", choices=MODOS_GRAFICO, default="area",
+                        help="modo do gráfico da linha do tempo no PDF")
+    args = parser.parse_args()
+    gerar_relatorios(args.resultados, args.bases, args.workers, not args.sem_coorte, args.modo_grafico)
@@ -0,0 +1,126 @@
+import sys
+import runpy
+import argparse
+from pathlib import Path
+
+# ============================
+# CLI única do projeto
+# ============================
+# Cada subcomando importa suas dependências só quando é executado, então
+# `python rp2.py --help` e os subcomandos leves abrem instantaneamente.
+#
+#   process    -> processa vídeos de entrevistas/ (relatorio_lote)
+#   summarize  -> monta resultados/resumo_frequencias.* (analise_resultados)
+#   stats      -> roda um dos scripts estatísticos
+#   plots      -> gera os gráficos do questionário (graficos.py)
+#   report     -> regera gráficos/PDFs (e o resumo da coorte) a partir dos resultados
+
+RAIZ = Path(__file__).resolve().parent
+
+SCRIPTS_ESTATISTICA = {
+    "teste": "teste.py",
+    "regressao": "regressao.py",
+    "quiquadrado": "quiquadrado.py",
+    "kruskal": "kruskal-walis-analise.py",
+}
+
+
+def _process(args):
+    import relatorio_lote
+    return relatorio_lote.executar(args)
+
+
+def _configurar_figuras(args):
+    from plotagem import configurar
+    configurar(args.formato, args.dpi)
+
+
+def _summarize(args):
+    _configurar_figuras(args)
+    from analise_resultados import processar_emocoes
+    processar_emocoes(args.resultados, forcar=args.forcar)
+    return 0
+
+
+def _rodar_script(nome):
+    runpy.run_path(str(RAIZ / nome), run_name="__main__")
+    return 0
+
+
+def _stats(args):
+    _configurar_figuras(args)
+    return _rodar_script(SCRIPTS_ESTATISTICA[args.analise])
+
+
+def _plots(args):
+    _configurar_figuras(args)
+    return _rodar_script("graficos.py")
+
+
+def _report(args):
+    from relatorios import gerar_relatorios
+
+    resultados = Path(args.resultados)
+    bases = args.bases or sorted(p.name for p in resultados.iterdir() if p.is_dir() and not p.name.startswith("."))
+    if args.grafico:
+        from relatorio_lote import salvar_grafico
+        from linha_do_tempo import ler_linha, caminho_linha
+        from episodios import caminho_episodios
+        for base in bases:
+            linha = caminho_linha(resultados / base, base)
+            episodios = caminho_episodios(resultados / base, base)
+            if linha.exists():
+                salvar_grafico(ler_linha(linha), resultados / base / f"{base}_emocoes.png", dpi=args.dpi or 150,
+                               modo=args.modo_grafico, episodios=ler_linha(episodios) if episodios.exists() else None)
+    gerar_relatorios(resultados, bases, workers=args.workers, coorte=not args.sem_coorte,
+                     modo_grafico=args.modo_grafico)
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog="rp2", description="Análise das entrevistas de saúde mental.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    # Os argumentos de "process" vêm do próprio relatorio_lote, que não carrega
+    # modelos nem bibliotecas pesadas ao ser importado
+    from relatorio_lote import configurar_argumentos
+    from linha_do_tempo import MODOS_GRAFICO
+    p = configurar_argumentos(sub.add_parser("process", help="processa os vídeos das entrevistas"))
+    p.set_defaults(func=_process)
+
+    # Opções de figura compartilhadas (pré-visualização rápida: --dpi 72)
+    figuras = argparse.ArgumentParser(add_help=False)
+    figuras.add_argument("--format", dest="formato", choices=("png", "svg", "pdf"), default=None)
+    figuras.add_argument("--dpi", type=int, default=None)
+
+    p = sub.add_parser("summarize", parents=[figuras], help="gera o resumo de frequências da coorte")
+    p.add_argument("--resultados", default="resultados")
+    p.add_argument("--forcar", action="store_true", help="reprocessa todas as pastas")
+    p.set_defaults(func=_summarize)
+
+    p = sub.add_parser("stats", parents=[figuras], help="roda uma análise estatística")
+    p.add_argument("analise", choices=sorted(SCRIPTS_ESTATISTICA))
+    p.set_defaults(func=_stats)
+
+    p = sub.add_parser("plots", parents=[figuras], help="gera os gráficos do questionário")
+    p.set_defaults(func=_plots)
+
+    p = sub.add_parser("report", parents=[figuras], help="regera os PDFs a partir dos resultados salvos")
+    p.add_argument("bases", nargs="*", help="pastas em resultados/ (padrão: todas)")
+    p.add_argument("--resultados", default="resultados")
+    p.add_argument("--grafico", action="store_true", help="regera também o gráfico a partir da linha do tempo")
+    p.add_argument("--modo-grafico", choices=MODOS_GRAFICO, default="area", help="modo do gráfico (PNG e PDF)")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--sem-coorte", action="store_true", help="não gera o resumo_coorte.pdf")
+    p.set_defaults(func=_report)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
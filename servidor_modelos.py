@@ -0,0 +1,227 @@
+import io
+import os
+import json
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+# ============================
+# Servidor local de modelos
+# ============================
+# Mantém Whisper e o modelo de emoções carregados num processo de longa
+# duração. Scripts curtos falam com ele por HTTP em localhost e não pagam o
+# carregamento dos modelos a cada execução.
+#
+#   GET  /saude            -> modelos carregados
+#   POST /transcrever      -> JSON {"caminho": ..., "modelo": ..., "opcoes": {...}}
+#                             ou corpo float32 cru (16 kHz mono) com ?modelo=...&opcoes=<json>
+#   POST /analisar_frames  -> corpo .npy com frames BGR (N, H, W, 3) uint8, ?detector=...
+#   POST /classificar      -> corpo .npy com recortes (N, 48, 48) float32
+
+ENDERECO_PADRAO = os.environ.get("RP2_SERVIDOR_MODELOS", "http://127.0.0.1:8765")
+
+
+def _npy_para_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _bytes_para_npy(dados):
+    return np.load(io.BytesIO(dados), allow_pickle=False)
+
+
+def _resultado_serializavel(resultado):
+    probs = resultado["probabilidades"]
+    return {**resultado, "probabilidades": probs.tolist() if probs is not None else None}
+
+
+class Modelos:
+    # Cache de modelos do processo servidor; um lock por modelo porque nem
+    # Whisper nem o Keras são seguros para chamadas concorrentes
+    def __init__(self, detector_backend="opencv"):
+        self._whisper = {}
+        self._locks = {}
+        self._lock_global = threading.Lock()
+        self.detector_backend = detector_backend
+        self._motor = None
+
+    def _lock(self, nome):
+        with self._lock_global:
+            return self._locks.setdefault(nome, threading.Lock())
+
+    def whisper(self, nome):
+        with self._lock(f"carregar:{nome}"):
+            if nome not in self._whisper:
+                import whisper
+                print(f"Carregando Whisper '{nome}'...")
+                self._whisper[nome] = whisper.load_model(nome)
+        return self._whisper[nome]
+
+    @property
+    def motor(self):
+        with self._lock("carregar:emocoes"):
+            if self._motor is None:
+                from inferencia import MotorEmocoes
+                print("Carregando modelo de emoções...")
+                self._motor = MotorEmocoes(detector_backend=self.detector_backend)
+                self._motor.modelo
+        return self._motor
+
+    def transcrever(self, audio, modelo, opcoes):
+        whisper_model = self.whisper(modelo)
+        with self._lock(f"whisper:{modelo}"):
+            return whisper_model.transcribe(audio, **opcoes)
+
+    def analisar_frames(self, frames, detector_backend=None):
+        motor = self.motor
+        with self._lock("emocoes"):
+            motor.detector_backend = detector_backend or self.detector_backend
+            return [_resultado_serializavel(r) for r in motor.analisar_lote(list(frames))]
+
+    def classificar(self, recortes):
+        motor = self.motor
+        with self._lock("emocoes"):
+            return motor.classificar(list(recortes))
+
+    def carregados(self):
+        return {"whisper": sorted(self._whisper), "emocoes": self._motor is not None}
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    modelos = None
+
+    def _responder(self, status, corpo, tipo="application/json"):
+        if tipo == "application/json":
+            corpo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _corpo(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/saude":
+            self._responder(200, {"ok": True, "modelos": self.modelos.carregados()})
+        else:
+            self._responder(404, {"erro": "rota inexistente"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == "/transcrever":
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    pedido = json.loads(self._corpo())
+                    audio = pedido["caminho"]
+                    modelo = pedido.get("modelo", "turbo")
+                    opcoes = pedido.get("opcoes", {})
+                else:
+                    audio = np.frombuffer(self._corpo(), dtype=np.float32)
+                    modelo = parametros.get("modelo", "turbo")
+                    opcoes = json.loads(parametros.get("opcoes", "{}"))
+                self._responder(200, self.modelos.transcrever(audio, modelo, opcoes))
+            elif url.path == "/analisar_frames":
+                self._responder(200, self.modelos.analisar_frames(_bytes_para_npy(self._corpo()), parametros.get("detector")))
+            elif url.path == "/classificar":
+                probs = self.modelos.classificar(_bytes_para_npy(self._corpo()))
+                self._responder(200, _npy_para_bytes(probs), "application/octet-stream")
+            else:
+                self._responder(404, {"erro": "rota inexistente"})
+        except Exception as e:
+            self._responder(500, {"erro": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def servir(host="127.0.0.1", porta=8765, whisper_modelos=("turbo",), emocoes=True, detector_backend="opencv"):
+    modelos = Modelos(detector_backend=detector_backend)
+    # Aquece os modelos antes de aceitar conexões
+    for nome in whisper_modelos:
+        modelos.whisper(nome)
+    if emocoes:
+        modelos.motor
+
+    _Manipulador.modelos = modelos
+    servidor = ThreadingHTTPServer((host, porta), _Manipulador)
+    print(f"✅ Servidor de modelos em http://{host}:{porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+# ============================
+# Cliente
+# ============================
+class ErroServidor(RuntimeError):
+    pass
+
+
+class ClienteModelos:
+    def __init__(self, endereco=ENDERECO_PADRAO, timeout=600):
+        self.endereco = endereco.rstrip("/")
+        self.timeout = timeout
+
+    def _pedir(self, rota, corpo=None, tipo="application/json", timeout=None):
+        pedido = urllib.request.Request(self.endereco + rota, data=corpo, method="POST" if corpo is not None else "GET")
+        if corpo is not None:
+            pedido.add_header("Content-Type", tipo)
+        try:
+            with urllib.request.urlopen(pedido, timeout=timeout or self.timeout) as resposta:
+                dados = resposta.read()
+                if resposta.headers.get("Content-Type", "").startswith("application/json"):
+                    return json.loads(dados)
+                return dados
+        except urllib.error.HTTPError as e:
+            raise ErroServidor(json.loads(e.read() or b"{}").get("erro", str(e))) from e
+
+    def disponivel(self):
+        try:
+            return bool(self._pedir("/saude", timeout=0.5).get("ok"))
+        except (OSError, ErroServidor, ValueError):
+            return False
+
+    def transcrever(self, audio, modelo="turbo", **opcoes):
+        # `audio` pode ser um caminho (lido pelo servidor) ou um array float32 16 kHz
+        if isinstance(audio, (str, os.PathLike)):
+            corpo = json.dumps({"caminho": os.path.abspath(audio), "modelo": modelo, "opcoes": opcoes}).encode("utf-8")
+            return self._pedir("/transcrever", corpo)
+        consulta = f"?modelo={modelo}&opcoes={urllib.request.quote(json.dumps(opcoes))}"
+        corpo = np.ascontiguousarray(audio, dtype=np.float32).tobytes()
+        return self._pedir("/transcrever" + consulta, corpo, "application/octet-stream")
+
+    def analisar_frames(self, frames, detector_backend=None):
+        # Detecção + classificação no servidor; devolve o formato de resultado_emocao
+        rota = "/analisar_frames" + (f"?detector={detector_backend}" if detector_backend else "")
+        resultados = self._pedir(rota, _npy_para_bytes(np.asarray(frames)), "application/octet-stream")
+        for r in resultados:
+            if r["probabilidades"] is not None:
+                r["probabilidades"] = np.asarray(r["probabilidades"], dtype=np.float32)
+        return resultados
+
+    def classificar(self, recortes):
+        lote = np.stack(recortes).astype(np.float32) if len(recortes) else np.zeros((0, 48, 48), np.float32)
+        return _bytes_para_npy(self._pedir("/classificar", _npy_para_bytes(lote), "application/octet-stream"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que mantém Whisper e DeepFace carregados.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--whisper", nargs="*", default=["turbo"], help="modelos Whisper para pré-carregar")
+    parser.add_argument("--sem-emocoes", action="store_true")
+    parser.add_argument("--detector", default="opencv")
+    args = parser.parse_args()
+    servir(args.host, args.porta, args.whisper, not args.sem_emocoes, args.detector)
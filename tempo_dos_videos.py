@@ -1,7 +1,8 @@
 import os
-import cv2
 import numpy as np
 
+from decodificacao import sondar_video
+
 def analisar_videos(pasta):
     # Lista de extensões de vídeo comuns
     extensoes_validas = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv'}
@@ -23,19 +24,14 @@ def analisar_videos(pasta):
                 caminho_completo = os.path.join(raiz, arquivo)
                 
                 try:
-                    # Abre o vídeo para pegar metadados
-                    cap = cv2.VideoCapture(caminho_completo)
-                    
-                    if cap.isOpened():
-                        fps = cap.get(cv2.CAP_PROP_FPS)
-                        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                        
-                        # Calcula duração em segundos (Frames / Frames por Segundo)
-                        if fps > 0:
-                            duracao_segundos = frame_count / fps
-                            duracoes.append(duracao_segundos)
+                    # Lê a duração do container via ffprobe (sem abrir um decodificador)
+                    info = sondar_video(caminho_completo)
                     
-                    cap.release()
+                    if info["duracao"] > 0:
+                        duracoes.append(info["duracao"])
+                    elif info["fps"] > 0:
+                        # Sem duração no container: Frames / Frames por Segundo
+                        duracoes.append(info["n_frames"] / info["fps"])
                 except Exception as e:
                     print(f"Não foi possível ler {arquivo}: {e}")
 
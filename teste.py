@@ -1,53 +1,18 @@
 import pandas as pd
 import numpy as np
 import seaborn as sns
+from plotagem import salvar_figura
 import matplotlib.pyplot as plt
 import scipy.stats as stats
 
-# =================================================================
-# 1. CARREGAMENTO DOS DADOS
-# =================================================================
-df_emotions = pd.read_csv("resultados/resumo_frequencias.csv", sep=";")
-df_survey = pd.read_csv("Saúde Mental na EACH (respostas) - Respostas ao formulário 1.csv")
+from dados import carregar_dataset
 
 # =================================================================
-# 2. LIMPEZA E CÁLCULO PSS TOTAL
+# 1. CARREGAMENTO DOS DADOS (questionário + emoções, PSS já calculado)
 # =================================================================
-def clean_name(name):
-    if pd.isna(name):
-        return None
-    return str(name).lower().strip()
-
-# PSS Total Calculation
-pss_cols = df_survey.columns[-10:].tolist()
-def reverse_score(series): return 4 - series
-df_pss = df_survey[pss_cols].copy()
-for col in pss_cols:
-    df_pss[col] = pd.to_numeric(df_pss[col], errors='coerce').astype('Int64') 
-reverse_indices = [3, 4, 6, 7] 
-for idx in reverse_indices:
-    if idx < len(pss_cols):
-        col_name = pss_cols[idx]
-        df_pss[col_name] = reverse_score(df_pss[col_name])
-df_survey['PSS_Total'] = df_pss.sum(axis=1, skipna=True)
-
-
-# Emotion Predominant Calculation (without neutral)
-emotion_cols_without_neutral = ['sad', 'fear', 'surprise', 'happy', 'angry', 'disgust', 'neutral']
-df_emotions['Predominant_Emotion'] = df_emotions[emotion_cols_without_neutral].idxmax(axis=1)
-
-# Merge
-df_survey.rename(columns={'Nome completo:': 'Nome'}, inplace=True)
-df_survey['Nome_cleaned'] = df_survey['Nome'].apply(clean_name)
-df_emotions['Pessoa_cleaned'] = df_emotions['Pessoa'].apply(clean_name)
-
-df_analysis = pd.merge(
-    df_survey,
-    df_emotions[['Pessoa_cleaned', 'sad', 'fear', 'surprise', 'happy', 'angry', 'disgust', 'neutral']],
-    left_on='Nome_cleaned',
-    right_on='Pessoa_cleaned',
-    how='inner'
-)
+df_analysis = carregar_dataset()
+df_analysis = df_analysis[[c for c in df_analysis.columns if c not in ('Pessoa', 'Nome_cleaned')]]
+df_analysis.rename(columns={'Nome completo:': 'Nome'}, inplace=True)
 
 df_analysis.drop(['Pessoa_cleaned', 'Carimbo de data/hora', 'Endereço de e-mail', 'Nome', 'No último mês, com que frequência você ficou chateado(a) por algo que aconteceu inesperadamente?',
        'No último mês, com que frequência você sentiu que não conseguia controlar as coisas importantes na sua vida?',
@@ -114,7 +79,7 @@ for i, mean_val in enumerate(means):
             horizontalalignment='center', color='red', weight='bold')
 
 plt.tight_layout()
-plt.show()
+salvar_figura("teste_positivas_vs_negativas")
 
 
 df_analysis["Emoção Predominante"] = np.where(
@@ -128,7 +93,7 @@ sns.boxplot(data=df_analysis, x='Emoção Predominante', y='PSS_Total', palette=
 plt.title('Distribuição do PSS por Grupo Emocional (Positivo vs Negativo)')
 plt.ylabel('Nível de Estresse (PSS)')
 plt.xlabel('Tipo de Emoção Predominante no Rosto')
-plt.show()
+salvar_figura("teste_pss_por_grupo")
 
 
 print("\nDataFrame after adding Predominant Emotion:\n", df_analysis[['Emoções_Positivas', 'Emoções Negativas', 'Emoção Predominante']].head())
@@ -173,7 +138,7 @@ else:
 
 # 2. Gráfico Q-Q (Visual)
 stats.probplot(grupo_neg, dist="norm", plot=plt)
-plt.show()
+salvar_figura("teste_qq_negativas")
 
 estatistica, p_valor = stats.mannwhitneyu(grupo_pos, grupo_neg)
 
@@ -227,7 +192,7 @@ max_neg = df_analysis.loc[df_analysis['Emoções Negativas'].idxmax()]
 
 plt.tight_layout()
 
-plt.show()
+salvar_figura("teste_positivas_x_negativas")
 
 print(df_analysis[['Emoções_Positivas', 'Emoções Negativas']].describe())
 
@@ -1,31 +1,31 @@
-import sounddevice as sd
-import whisper
+import os
+import re
+import sys
+import time
+import queue
 import datetime
 import json
-import numpy as np
-import tempfile
-from scipy.io.wavfile import write
-from langchain_community.llms import Ollama
-from langchain.prompts import PromptTemplate
-import tkinter as tk
-from tkinter import messagebox
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from servidor_modelos import ClienteModelos
+from transcricao import TranscritorStreaming
 
 # ---- Configuração ----
-historico = []
-llm = Ollama(model="llama3.2")
-template = PromptTemplate(
-    input_variables=["historico", "pergunta_nova"],
-    template=(
-        "Você é um entrevistador em uma conversa sobre saúde mental. "
-        "Aqui está o histórico da entrevista até agora:\n\n{historico}\n\n"
-        "Essa é a próxima pergunta que você deverá fazer:\n\n{pergunta_nova}\n\n."
-        "Com base nisso, faça alterações na pergunta de forma natural, "
-        "em português, SEM responder por você mesmo. "
-        "Não quero sugestões de perguntas, quero que você apenas reformule a pergunta dada,"
-        "com base no histórico.\n"
-    )
+# Nada pesado roda na thread do Tk: o microfone entrega blocos por callback,
+# a transcrição (em streaming, trecho a trecho) e o LLM rodam em threads
+# próprias e devolvem o resultado por uma fila que a interface lê com root.after.
+TEMPLATE = (
+    "Você é um entrevistador em uma conversa sobre saúde mental. "
+    "Aqui está o histórico da entrevista até agora:\n\n{historico}\n\n"
+    "Essa é a próxima pergunta que você deverá fazer:\n\n{pergunta_nova}\n\n."
+    "Com base nisso, faça alterações na pergunta de forma natural, "
+    "em português, SEM responder por você mesmo. "
+    "Não quero sugestões de perguntas, quero que você apenas reformule a pergunta dada,"
+    "com base no histórico.\n"
 )
-modelo_whisper = whisper.load_model("base")
 
 perguntas = [
     "Qual é o seu nome?",
@@ -36,94 +36,290 @@ perguntas = [
     "Você já procurou ajuda profissional para sua saúde mental?",
     "Como você lida com o estresse no seu dia a dia?",
 ]
-num_pergunta_atual = 0
 
 # ---- Variáveis de gravação ----
 fs = 16000
-duracao = 5
-audio_data = None
-gravando = False
-
-def iniciar_gravacao():
-    global gravando, audio_data
-    gravando = True
-    status_label.config(text="🎤 Gravando... fale agora!")
-    audio_data = sd.rec(int(duracao * fs), samplerate=fs, channels=1, dtype="float32")
-    # Não espera aqui! O usuário vai clicar em "Parar" quando quiser.
-
-def parar_gravacao():
-    global gravando, audio_data
-    if gravando and audio_data is not None:
-        sd.wait()  # Finaliza a gravação
-        gravando = False
-        status_label.config(text="✅ Gravação concluída.")
-        resposta = transcrever(audio_data, fs)
+INTERVALO_UI = 50     # ms entre leituras da fila de resultados
+PARCIAL_A_CADA = 1.0  # s entre textos parciais enquanto a pessoa fala
+
+
+class LLMStub:
+    # Substitui o Ollama em testes: devolve a própria pergunta após um atraso
+    def __init__(self, atraso=1.0):
+        self.atraso = atraso
+
+    def __call__(self, prompt):
+        time.sleep(self.atraso)
+        achado = re.search(r"deverá fazer:\n\n(.*?)\n\n\.", prompt, re.S)
+        return f"(stub) {achado.group(1) if achado else prompt[-80:]}"
+
+
+def criar_llm(stub=False):
+    if stub or os.environ.get("RP2_LLM_STUB"):
+        return LLMStub()
+    from langchain_community.llms import Ollama
+    return Ollama(model="llama3.2")
+
+
+# Se o servidor de modelos estiver no ar, o Whisper já está quente nele;
+# senão o modelo local só é carregado na primeira transcrição. A consulta ao
+# servidor só acontece quando uma entrevista começa, não ao importar o módulo.
+cliente_modelos = ClienteModelos()
+_usar_servidor = None
+modelo_whisper = None
+
+def usar_servidor():
+    global _usar_servidor
+    if _usar_servidor is None:
+        _usar_servidor = cliente_modelos.disponivel()
+    return _usar_servidor
+
+def obter_whisper():
+    global modelo_whisper
+    if modelo_whisper is None:
+        import whisper
+        modelo_whisper = whisper.load_model("base")
+    return modelo_whisper
+
+def transcrever(audio, **opcoes):
+    # O Whisper recebe o array float32 16 kHz direto: sem WAV temporário em disco
+    if usar_servidor():
+        return cliente_modelos.transcrever(audio, modelo="base", language="pt", fp16=False, **opcoes)
+    return obter_whisper().transcribe(audio, language="pt", fp16=False, **opcoes)
+
+
+def formatar_historico(historico):
+    return "\n".join(f"Q: {h['pergunta']}\nA: {h['resposta']}" for h in historico)
+
+
+class Entrevista:
+    # Estado e fluxo da entrevista, sem Tk: cada resultado de uma thread de
+    # trabalho vira uma chamada (funcao, args) na fila `eventos`, executada
+    # pela interface na thread principal
+    def __init__(self, llm, transcrever=transcrever):
+        usar_servidor()
+        self.llm = llm
+        self.transcrever = transcrever
+        self.historico = []
+        self.num_pergunta_atual = 0
+        self.pergunta = perguntas[0]
+        self.num_pergunta_atual += 1
+        self.eventos = queue.Queue()
+        # Uma thread para o Whisper e outra para o LLM: uma transcrição longa
+        # não atrasa a reformulação especulativa e vice-versa
+        self._audio = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcricao")
+        self._llm = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+        self._especulada = None  # (indice da pergunta, future)
+        self.ts_pergunta = datetime.datetime.now().isoformat()
+
+    def _entregar(self, callback, *args):
+        self.eventos.put((callback, args))
+
+    def _reformular(self, historico, pergunta_base):
+        return self.llm(TEMPLATE.format(historico=formatar_historico(historico), pergunta_nova=pergunta_base)).strip()
+
+    def especular(self):
+        # Chamado quando o participante começa a responder: a próxima pergunta
+        # já vai sendo reformulada com o histórico até a resposta anterior
+        if self.num_pergunta_atual >= len(perguntas):
+            return
+        indice = self.num_pergunta_atual
+        if self._especulada is None or self._especulada[0] != indice:
+            futuro = self._llm.submit(self._reformular, list(self.historico), perguntas[indice])
+            self._especulada = (indice, futuro)
+
+    def iniciar_resposta(self, ao_parcial):
+        # Abre a transcrição em streaming da resposta: os blocos do microfone
+        # chegam por alimentar() e o texto parcial volta por ao_parcial
+        self._blocos = queue.Queue()
+        self._resposta = self._audio.submit(self._transcrever_resposta, self._blocos, ao_parcial)
+
+    def alimentar(self, bloco):
+        # Chamado no callback do sounddevice: só enfileira, nunca bloqueia
+        self._blocos.put(bloco.reshape(-1).copy())
+
+    def _transcrever_resposta(self, blocos, ao_parcial):
+        transcritor = TranscritorStreaming(self.transcrever, taxa=fs, parcial_a_cada=PARCIAL_A_CADA)
+        finais = []
+        while True:
+            bloco = blocos.get()
+            eventos = transcritor.alimentar(bloco) if bloco is not None else transcritor.finalizar()
+            for evento in eventos:
+                if evento["tipo"] == "final":
+                    finais.append(evento["texto"])
+                    parcial = ""
+                else:
+                    parcial = evento["texto"]
+                self._entregar(ao_parcial, " ".join(finais + [parcial]).strip())
+            if bloco is None:
+                return " ".join(finais).strip()
+
+    def concluir_resposta(self, ao_transcrever, ao_reformular):
+        self._blocos.put(None)
+        self._resposta.add_done_callback(lambda f: self._transcrito(f, ao_transcrever, ao_reformular))
+
+    def _transcrito(self, futuro, ao_transcrever, ao_reformular):
+        try:
+            resposta = futuro.result()
+        except Exception as e:
+            self._entregar(ao_transcrever, None, e)
+            return
+        print(resposta)
+        self._entregar(ao_transcrever, resposta, None)
+        self._entregar(self._registrar, resposta, ao_reformular)
+
+    def _registrar(self, resposta, ao_reformular):
+        # Roda na thread da interface: atualiza o histórico e pega a
+        # reformulação especulada (ou pede uma agora, se não houver)
+        ts_resposta = datetime.datetime.now().isoformat()
+        registro = {
+            "pergunta": self.pergunta,
+            "pergunta_timestamp": self.ts_pergunta,
+            "resposta": resposta,
+            "resposta_timestamp": ts_resposta,
+            "proxima_pergunta": None,
+        }
+        self.historico.append(registro)
+        if self.num_pergunta_atual >= len(perguntas):
+            self._entregar(ao_reformular, None, None)
+            return
+
+        indice = self.num_pergunta_atual
+        if self._especulada and self._especulada[0] == indice:
+            futuro = self._especulada[1]
+        else:
+            futuro = self._llm.submit(self._reformular, list(self.historico), perguntas[indice])
+        self._especulada = None
+
+        def pronto(f):
+            try:
+                self._entregar(self._avancar, registro, f.result(), ao_reformular)
+            except Exception as e:
+                self._entregar(ao_reformular, None, e)
+        futuro.add_done_callback(pronto)
+
+    def _avancar(self, registro, pergunta_nova, ao_reformular):
+        registro["proxima_pergunta"] = pergunta_nova
+        self.num_pergunta_atual += 1
+        self.pergunta = pergunta_nova
+        self.ts_pergunta = datetime.datetime.now().isoformat()
+        ao_reformular(pergunta_nova, None)
+
+    def processar_eventos(self):
+        # Executa os callbacks pendentes (na thread que chamar, ou seja, a do Tk)
+        while True:
+            try:
+                callback, args = self.eventos.get_nowait()
+            except queue.Empty:
+                return
+            callback(*args)
+
+    def salvar(self, caminho="entrevista.json"):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.historico, f, indent=4, ensure_ascii=False)
+
+    def encerrar(self):
+        self._audio.shutdown(wait=False, cancel_futures=True)
+        self._llm.shutdown(wait=False, cancel_futures=True)
+
+
+# ---- Interface gráfica ----
+def main(stub_llm=False):
+    import sounddevice as sd
+    import tkinter as tk
+    from tkinter import messagebox
+
+    entrevista = Entrevista(criar_llm(stub_llm))
+    gravacao = {"stream": None}
+
+    def iniciar_gravacao():
+        if gravacao["stream"] is not None:
+            return
+        status_label.config(text="🎤 Gravando... fale agora!")
+        entrevista.iniciar_resposta(ao_parcial)
+        # Blocos de áudio vão direto do callback para a transcrição em streaming
+        gravacao["stream"] = sd.InputStream(samplerate=fs, channels=1, dtype="float32",
+                                            blocksize=int(fs * 0.1),
+                                            callback=lambda dados, *_: entrevista.alimentar(dados))
+        gravacao["stream"].start()
+        entrevista.especular()
+
+    def parar_gravacao():
+        stream = gravacao["stream"]
+        if stream is None:
+            messagebox.showinfo("Info", "Nenhuma gravação em andamento.")
+            return
+        stream.stop()
+        stream.close()
+        gravacao["stream"] = None
+        status_label.config(text="⏳ Finalizando a transcrição...")
+        btn_gravar.config(state=tk.DISABLED)
+        entrevista.concluir_resposta(ao_transcrever, ao_reformular)
+
+    def ao_parcial(texto):
+        resposta_label.config(text=f"👤 Você: {texto}")
+
+    def ao_transcrever(resposta, erro):
+        if erro is not None:
+            status_label.config(text=f"❌ Erro na transcrição: {erro}")
+            btn_gravar.config(state=tk.NORMAL)
+            return
         resposta_label.config(text=f"👤 Você: {resposta}")
-        registrar_resposta(resposta)
-        audio_data = None
-    else:
-        messagebox.showinfo("Info", "Nenhuma gravação em andamento.")
-
-def transcrever(audio_data, fs):
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmpfile:
-        write(tmpfile.name, fs, (audio_data * 32767).astype(np.int16))
-        result = modelo_whisper.transcribe(tmpfile.name, language="pt", fp16=False)
-        print(result["text"])
-    return result["text"]
-
-def registrar_resposta(resposta):
-    global pergunta, perguntas, num_pergunta_atual
-    ts_pergunta = datetime.datetime.now().isoformat()
-    ts_resposta = datetime.datetime.now().isoformat()
-    contexto = "\n".join(
-        [f"Q: {h['pergunta']}\nA: {h['resposta']}" for h in historico]
+        status_label.config(text="⏳ Preparando a próxima pergunta...")
+
+    def ao_reformular(pergunta_nova, erro):
+        btn_gravar.config(state=tk.NORMAL)
+        if erro is not None:
+            status_label.config(text=f"❌ Erro no LLM: {erro}")
+        elif pergunta_nova is None:
+            status_label.config(text="✅ Entrevista concluída.")
+        else:
+            status_label.config(text="✅ Gravação concluída.")
+            pergunta_label.config(text=f"🤖 Entrevistador: {pergunta_nova}")
+
+    def salvar_entrevista():
+        entrevista.salvar("entrevista.json")
+        messagebox.showinfo("Salvo", "📁 Entrevista salva em entrevista.json")
+
+    def bombear():
+        entrevista.processar_eventos()
+        root.after(INTERVALO_UI, bombear)
+
+    root = tk.Tk()
+    root.title("Entrevista Saúde Mental")
+
+    pergunta_label = tk.Label(
+        root,
+        text=f"🤖 Entrevistador: {entrevista.pergunta}",
+        font=("Arial", 14),
+        wraplength=500,  # Limita largura e quebra linha
+        justify="left"   # Alinha à esquerda
     )
-    pergunta_nova = llm(template.format(historico=contexto, pergunta_nova=perguntas[num_pergunta_atual]), ).strip()
-    historico.append({
-        "pergunta": pergunta,
-        "pergunta_timestamp": ts_pergunta,
-        "resposta": resposta,
-        "resposta_timestamp": ts_resposta,
-        "proxima_pergunta": pergunta_nova
-    })
-    num_pergunta_atual += 1
-    pergunta_label.config(text=f"🤖 Entrevistador: {pergunta_nova}")
-    pergunta = pergunta_nova
-
-def salvar_entrevista():
-    with open("entrevista.json", "w", encoding="utf-8") as f:
-        json.dump(historico, f, indent=4, ensure_ascii=False)
-    messagebox.showinfo("Salvo", "📁 Entrevista salva em entrevista.json")
+    pergunta_label.pack(pady=10)
 
-# ---- Interface gráfica ----
-pergunta = perguntas[num_pergunta_atual]
-num_pergunta_atual += 1
-
-root = tk.Tk()
-root.title("Entrevista Saúde Mental")
-
-pergunta_label = tk.Label(
-    root,
-    text=f"🤖 Entrevistador: {pergunta}",
-    font=("Arial", 14),
-    wraplength=500,  # Limita largura e quebra linha
-    justify="left"   # Alinha à esquerda
-)
-pergunta_label.pack(pady=10)
+    resposta_label = tk.Label(root, text="👤 Você: ", font=("Arial", 12))
+    resposta_label.pack(pady=10)
+
+    status_label = tk.Label(root, text="", font=("Arial", 10))
+    status_label.pack(pady=5)
 
-resposta_label = tk.Label(root, text="👤 Você: ", font=("Arial", 12))
-resposta_label.pack(pady=10)
+    btn_gravar = tk.Button(root, text="Começar Gravação", command=iniciar_gravacao)
+    btn_gravar.pack(side=tk.LEFT, padx=10, pady=20)
 
-status_label = tk.Label(root, text="", font=("Arial", 10))
-status_label.pack(pady=5)
+    btn_parar = tk.Button(root, text="Parar Gravação", command=parar_gravacao)
+    btn_parar.pack(side=tk.LEFT, padx=10, pady=20)
 
-btn_gravar = tk.Button(root, text="Começar Gravação", command=iniciar_gravacao)
-btn_gravar.pack(side=tk.LEFT, padx=10, pady=20)
+    btn_salvar = tk.Button(root, text="Salvar Entrevista", command=salvar_entrevista)
+    btn_salvar.pack(side=tk.RIGHT, padx=10, pady=20)
 
-btn_parar = tk.Button(root, text="Parar Gravação", command=parar_gravacao)
-btn_parar.pack(side=tk.LEFT, padx=10, pady=20)
+    root.after(INTERVALO_UI, bombear)
+    try:
+        root.mainloop()
+    finally:
+        entrevista.encerrar()
 
-btn_salvar = tk.Button(root, text="Salvar Entrevista", command=salvar_entrevista)
-btn_salvar.pack(side=tk.RIGHT, padx=10, pady=20)
 
-root.mainloop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrevista guiada com gravação, Whisper e LLM.")
+    parser.add_argument("--stub-llm", action="store_true", help="usa um LLM falso local (testes sem Ollama)")
+    main(parser.parse_args().stub_llm)
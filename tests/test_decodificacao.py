@@ -0,0 +1,45 @@
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from decodificacao import LeitorFFmpeg, sondar_video
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None, reason="ffmpeg/ffprobe indisponíveis",
+)
+
+# 20 frames a cada 0,1 s e depois 20 a cada 0,3 s: taxa média de 5 fps, mas
+# r_frame_rate "adivinhado" de 10 fps. O brilho de cada frame é 6 * N, então
+# dá para saber qual frame de origem saiu em cada instante.
+N_RAPIDOS, N_LENTOS = 20, 20
+
+
+def _tempos_origem():
+    return np.concatenate([np.arange(N_RAPIDOS) * 0.1, 2.0 + np.arange(N_LENTOS) * 0.3])
+
+
+@pytest.fixture
+def video_vfr(tmp_path):
+    caminho = tmp_path / "vfr.mkv"
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-f", "lavfi",
+        "-i", f"nullsrc=s=32x32:r=10:d={(N_RAPIDOS + N_LENTOS) / 10},format=gray,geq=lum='6*N'",
+        "-vf", f"settb=1/1000,setpts='if(lt(N,{N_RAPIDOS}),N/10,2+(N-{N_RAPIDOS})*0.3)/TB'",
+        "-fps_mode", "vfr", "-c:v", "ffv1", str(caminho),
+    ], check=True)
+    return caminho
+
+
+def test_tempos_acompanham_video_vfr(video_vfr):
+    origem = _tempos_origem()
+    fps = sondar_video(video_vfr)["fps"]
+    tempos = []
+    for tempo, frame in LeitorFFmpeg(video_vfr):
+        indice = int(round(float(frame.mean()) / 6))
+        # O frame entregue é o que estava na tela naquele instante
+        assert abs(origem[min(indice, len(origem) - 1)] - tempo) <= 0.3 + 1 / fps
+        tempos.append(tempo)
+    # Nem frames duplicados até o dobro da duração, nem o vídeo cortado
+    assert tempos[-1] == pytest.approx(origem[-1], abs=0.3 + 1 / fps)
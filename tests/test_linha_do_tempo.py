@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from linha_do_tempo import DTYPE_LINHA, N_EMOCOES, para_linha, para_registros, proporcoes_por_janela, resumo_linha
+from relatorio_lote import combinar
+
+
+def test_para_linha_vazia():
+    linha = para_linha([])
+    assert linha.dtype == DTYPE_LINHA
+    assert len(linha) == 0
+    assert para_registros(linha) == []
+    assert resumo_linha(linha)["n_frames"] == 0
+
+
+def test_combinar_sem_frames():
+    frases = [{"texto": "olá", "inicio": 0.0, "fim": 1.5}]
+    resultado = combinar(frases, [])
+    assert resultado[0]["emocao_facial"] == "indefinido"
+    assert resultado[0]["n_frames"] == 0
+    assert not any(resultado[0]["proporcoes"].values())
+
+
+def test_para_linha_ida_e_volta():
+    emotions = [
+        {"tempo": 0.0, "emocao": "happy", "confianca": 0.9, "origem": "deteccao", "bbox": [1, 2, 30, 40],
+         "probabilidades": {"happy": 0.7, "neutral": 0.3}},
+        {"tempo": 0.5, "emocao": "indefinido", "confianca": 0.0, "origem": "sem_rosto", "bbox": None,
+         "probabilidades": None},
+    ]
+    registros = para_registros(para_linha(emotions))
+    assert registros[0]["emocao"] == "happy"
+    assert registros[0]["bbox"] == [1, 2, 30, 40]
+    assert registros[0]["origem"] == "deteccao"
+    assert np.isclose(registros[0]["probabilidades"]["happy"], 0.7, atol=1e-3)
+    assert registros[1]["bbox"] is None
+    assert registros[1]["probabilidades"] is None
+
+
+def test_proporcoes_suavizacao_maior_que_janelas():
+    bordas, proporcoes, n_frames = proporcoes_por_janela([0.0, 0.1, 0.2], [5, 5, 3], n_janelas=3, suavizacao=5)
+    assert bordas.shape == (4,)
+    assert proporcoes.shape == (3, N_EMOCOES + 1)
+    assert n_frames.shape == (3,)
+    assert np.allclose(proporcoes.sum(axis=1), 1.0)
+
+
+def test_salvar_grafico_video_curto(tmp_path):
+    pytest.importorskip("matplotlib")
+    from relatorio_lote import salvar_grafico
+
+    linha = para_linha([{"tempo": t, "emocao": "happy"} for t in (0.0, 0.1, 0.2)])
+    for modo in ("area", "faixa"):
+        salvar_grafico(linha, tmp_path / f"{modo}.png", dpi=50, modo=modo, suavizacao=5)
+        assert (tmp_path / f"{modo}.png").exists()
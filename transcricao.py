@@ -0,0 +1,117 @@
+import numpy as np
+
+from audio import TAXA, DetectorVoz, blocos_audio
+
+# ============================
+# Transcrição em streaming
+# ============================
+# O áudio entra em blocos; o VAD separa trechos de fala e cada trecho vai
+# para o Whisper assim que termina (silêncio ou duração máxima). Enquanto a
+# pessoa ainda fala, um "parcial" do trecho atual pode ser emitido a cada
+# `parcial_a_cada` segundos. Todos os tempos são absolutos (desde o início
+# do fluxo) e os segmentos finais têm o mesmo formato de transcrever_com_tempo.
+
+
+def segmentos_whisper(resultado, deslocamento=0.0):
+    # Converte a saída do Whisper no formato do projeto, somando `deslocamento`
+    return [
+        {
+            "texto": seg["text"].strip(),
+            "inicio": round(seg["start"] + deslocamento, 3),
+            "fim": round(seg["end"] + deslocamento, 3),
+            "palavras": [
+                [w["word"].strip(), round(w["start"] + deslocamento, 3), round(w["end"] + deslocamento, 3)]
+                for w in seg.get("words", [])
+            ],
+        }
+        for seg in resultado["segments"]
+    ]
+
+
+class TranscritorStreaming:
+    # `transcrever(audio_float32, **opcoes) -> resultado do Whisper`
+    def __init__(self, transcrever, taxa=TAXA, parcial_a_cada=None, silencio_min=0.6, fala_min=0.3,
+                 max_segmento=20.0, margem=0.2, vad=None):
+        self.transcrever = transcrever
+        self.taxa = taxa
+        self.parcial_a_cada = parcial_a_cada
+        self.silencio_min = silencio_min
+        self.fala_min = fala_min
+        self.max_segmento = max_segmento
+        self.margem = margem
+        self.vad = vad or DetectorVoz(taxa)
+        self.amostras = 0          # amostras já vistas (relógio do fluxo)
+        self._trecho = []          # quadros do trecho de fala atual
+        self._inicio = None        # instante do início do trecho atual
+        self._silencio = 0.0
+        self._ultimo_parcial = 0.0
+        self._anteriores = []      # quadros recentes, incluídos no início do trecho
+        self._texto_anterior = ""
+
+    @property
+    def tempo(self):
+        return self.amostras / self.taxa
+
+    def _duracao_trecho(self):
+        return len(self._trecho) * self.vad.quadro / self.taxa
+
+    def _transcrever_trecho(self, tipo):
+        audio = np.concatenate(self._trecho)
+        opcoes = {"initial_prompt": self._texto_anterior} if self._texto_anterior else {}
+        segmentos = segmentos_whisper(self.transcrever(audio, **opcoes), self._inicio)
+        texto = " ".join(s["texto"] for s in segmentos)
+        return {"tipo": tipo, "inicio": round(self._inicio, 3), "fim": round(self._inicio + len(audio) / self.taxa, 3),
+                "texto": texto, "segmentos": segmentos}
+
+    def _fechar_trecho(self):
+        eventos = []
+        if self._trecho and self._duracao_trecho() - self._silencio >= self.fala_min:
+            evento = self._transcrever_trecho("final")
+            if evento["texto"]:
+                self._texto_anterior = evento["texto"][-200:]
+                eventos.append(evento)
+        self._trecho, self._inicio, self._silencio = [], None, 0.0
+        return eventos
+
+    def alimentar(self, bloco):
+        # Processa um bloco de áudio; devolve a lista de eventos prontos
+        eventos = []
+        quadros, voz = self.vad.alimentar(bloco)
+        duracao_quadro = self.vad.quadro / self.taxa
+        n_margem = max(int(self.margem / duracao_quadro), 0)
+
+        for quadro, tem_voz in zip(quadros, voz):
+            instante = self.tempo
+            self.amostras += len(quadro)
+            if self._inicio is None:
+                if tem_voz:
+                    # Começa um trecho, levando junto um pouco do áudio anterior
+                    self._trecho = self._anteriores + [quadro]
+                    self._inicio = instante - len(self._anteriores) * duracao_quadro
+                    self._ultimo_parcial = self.tempo
+                    self._anteriores = []
+                else:
+                    self._anteriores = (self._anteriores + [quadro])[-n_margem:] if n_margem else []
+                continue
+
+            self._trecho.append(quadro)
+            self._silencio = 0.0 if tem_voz else self._silencio + duracao_quadro
+            if self._silencio >= self.silencio_min or self._duracao_trecho() >= self.max_segmento:
+                eventos.extend(self._fechar_trecho())
+            elif self.parcial_a_cada and self.tempo - self._ultimo_parcial >= self.parcial_a_cada:
+                self._ultimo_parcial = self.tempo
+                eventos.append(self._transcrever_trecho("parcial"))
+        return eventos
+
+    def finalizar(self):
+        # Fim do fluxo: fecha o trecho que estiver aberto
+        return self._fechar_trecho() if self._inicio is not None else []
+
+
+def transcrever_fluxo(fonte, transcrever, taxa=TAXA, segundos_bloco=0.5, **opcoes):
+    # Gera eventos de `fonte` (array float32 em memória ou caminho lido pelo
+    # ffmpeg via pipe) à medida que os trechos ficam prontos
+    transcritor = TranscritorStreaming(transcrever, taxa=taxa, **opcoes)
+    for bloco in blocos_audio(fonte, taxa, segundos_bloco):
+        yield from transcritor.alimentar(bloco)
+    yield from transcritor.finalizar()